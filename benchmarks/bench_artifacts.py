@@ -0,0 +1,47 @@
+# tab1の出力ファイル作成(create_output_files)の時間とディスクI/Oを測る。
+# 使い方: python -m benchmarks.bench_artifacts [単語数]
+import sys
+import time
+import random
+import builtins
+from tab1 import tab1_func as t1
+from tab1.word_table import WordTable
+
+VOCAB = [" the", " lecture", " is", " about", " Dr.", " Smith", " and", " data.", " we", " see", " results."]
+
+
+def synthetic_words(count, seed=0):
+    rng = random.Random(seed)
+    words_data = []
+    t = 0.0
+    for _ in range(count):
+        t += rng.uniform(0.1, 0.6)
+        words_data.append({"start": round(t, 3), "end": round(t + 0.25, 3), "word": rng.choice(VOCAB)})
+    return words_data
+
+
+def main(count=20000):
+    words_data = WordTable.from_records(synthetic_words(count))
+    counters = {"read_opens": 0, "write_opens": 0}
+    original_open = builtins.open
+
+    def counting_open(file, mode='r', *args, **kwargs):
+        key = "read_opens" if ('r' in mode and '+' not in mode) else "write_opens"
+        counters[key] += 1
+        return original_open(file, mode, *args, **kwargs)
+
+    builtins.open = counting_open
+    try:
+        start = time.perf_counter()
+        t1.create_output_files(words_data, "benchmark.mp3")
+        elapsed = time.perf_counter() - start
+    finally:
+        builtins.open = original_open
+
+    print(f"words: {count}")
+    print(f"create_output_files: {elapsed:.3f}s")
+    print(f"files opened for reading: {counters['read_opens']}, for writing: {counters['write_opens']}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
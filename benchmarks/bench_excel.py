@@ -0,0 +1,71 @@
+# 字幕Excelの書き出し（common.excel_export）の時間とピークメモリを、以前の方法（pandas + セルごとの書式設定）と比べる。
+# 使い方: python -m benchmarks.bench_excel [行数 ...]
+import io
+import sys
+import time
+import tracemalloc
+import pandas as pd
+from openpyxl.styles import Alignment, Font, PatternFill
+from common import excel_export
+from benchmarks.bench_subtitles import synthetic_cues
+
+
+def previous_write(df, output):
+    # 以前の各タブと同じ処理
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Subtitles')
+        worksheet = writer.sheets['Subtitles']
+
+        column_widths = {'A': 7, 'B': 25, 'C': 25, 'D': 90, 'E': 90}
+        for column, width in column_widths.items():
+            worksheet.column_dimensions[column].width = width
+
+        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
+            for cell in row:
+                if cell.column_letter == 'A':
+                    cell.alignment = Alignment(horizontal='right', vertical='center')
+                elif cell.column_letter in ['B', 'C']:
+                    cell.alignment = Alignment(horizontal='center', vertical='center')
+                elif cell.column_letter in ['D', 'E']:
+                    cell.alignment = Alignment(horizontal='left', vertical='center')
+
+        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
+            worksheet.row_dimensions[row[0].row].height = 30
+
+        header_font = Font(bold=True)
+        for cell in worksheet["1:1"]:
+            cell.font = header_font
+            cell.alignment = Alignment(horizontal='center')
+            cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+
+
+def measure(write):
+    # 時間はtracemallocなしで測り、ピークメモリは別にもう1回実行して測る
+    start = time.perf_counter()
+    write(io.BytesIO())
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    write(io.BytesIO())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes=(10000, 100000)):
+    for count in sizes:
+        english = synthetic_cues(count, seed=1)
+        japanese = synthetic_cues(count, seed=2)
+        df = pd.DataFrame(excel_export.cue_rows(english, japanese), columns=excel_export.cue_headers(english, japanese))
+
+        print(f"rows: {count}")
+        for label, write in (
+            ("previous (pandas + per-cell styles)", lambda output: previous_write(df, output)),
+            ("excel_export.write_dataframe", lambda output: excel_export.write_dataframe(df, output)),
+            ("excel_export.write_cues", lambda output: excel_export.write_cues(output, english, japanese)),
+        ):
+            elapsed, peak = measure(write)
+            print(f"  {label:<38} {elapsed:7.2f}s  peak {peak / (1024 * 1024):7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or (10000, 100000))
@@ -0,0 +1,51 @@
+# 共通の字幕パーサー(common.subtitles)の解析・書き出し速度と、時刻の一括変換(common.timestamps)の速度を測る。
+# 使い方: python -m benchmarks.bench_subtitles [字幕数]
+import sys
+import time
+import random
+from common import subtitles
+from common import timestamps
+
+WORDS = ["the", "lecture", "is", "about", "Dr.", "Smith", "and", "data.", "we", "see", "results."]
+
+
+def synthetic_cues(count, seed=0):
+    rng = random.Random(seed)
+    cues = subtitles.Cues()
+    t = 0
+    for number in range(1, count + 1):
+        start = t + rng.randint(0, 500)
+        t = start + rng.randint(800, 6000)
+        cues.append(number, start, t, " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 14))))
+    return cues
+
+
+def main(count=100000):
+    cues = synthetic_cues(count)
+    print(f"cues: {count}")
+    for format_type, text in (("srt", subtitles.to_srt(cues)), ("vtt", subtitles.to_vtt(cues))):
+        lines = text.splitlines(keepends=True)
+        start = time.perf_counter()
+        parsed = subtitles.parse(lines)
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        subtitles.to_srt(parsed) if format_type == "srt" else subtitles.to_vtt(parsed)
+        write_time = time.perf_counter() - start
+
+        assert len(parsed) == count
+        print(f"{format_type}: parse {parse_time:.3f}s ({count / parse_time:,.0f} cues/s), "
+              f"write {write_time:.3f}s ({count / write_time:,.0f} cues/s)")
+
+    starts, _ = cues.numpy_columns()
+    start = time.perf_counter()
+    formatted = [timestamps.format_time(ms) for ms in cues.starts]
+    scalar_time = time.perf_counter() - start
+    start = time.perf_counter()
+    assert timestamps.format_column(starts) == formatted
+    column_time = time.perf_counter() - start
+    print(f"format timestamps: one by one {scalar_time:.3f}s, format_column {column_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,29 @@
+# SRT/TXT(NR,R)の組み立てが単語数に対して線形に伸びるかを確かめる。
+# 使い方: python -m benchmarks.bench_text_assembly [最大単語数]
+import sys
+import time
+from tab1 import tab1_func as t1
+from benchmarks.bench_artifacts import synthetic_words
+
+
+def build(words):
+    builder = t1.TranscriptBuilder()
+    for word in words:
+        builder.add_word(word["start"], word["end"], word["word"])
+    builder.finish()
+    return builder.srt_text(), builder.nr_text(), builder.r_text()
+
+
+def main(max_words=50000):
+    sizes = [max_words // 8, max_words // 4, max_words // 2, max_words]
+    print(f"{'words':>8} {'seconds':>9} {'us/word':>8}")
+    for size in sizes:
+        words = synthetic_words(size)
+        start = time.perf_counter()
+        build(words)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} {elapsed:>9.4f} {elapsed / size * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
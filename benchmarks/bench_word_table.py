@@ -0,0 +1,51 @@
+# 単語タイムスタンプの持ち方(dictのリストとWordTable)のピークメモリを比べる。
+# 使い方: python -m benchmarks.bench_word_table [単語数]
+import sys
+import time
+import tracemalloc
+from tab1.word_table import WordTable
+from tab1 import tab1_func as t1
+from benchmarks.bench_artifacts import synthetic_words
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(count=20000):
+    source = [(w["start"], w["end"], w["word"]) for w in synthetic_words(count)]
+
+    def build_dicts():
+        return [{"start": start, "end": end, "word": word} for start, end, word in source]
+
+    def build_table():
+        table = WordTable()
+        table.extend(source)
+        table.text()
+        return table
+
+    def segment_table():
+        builder = t1.TranscriptBuilder()
+        for start, end, word in table:
+            builder.add_word(start, end, word)
+        builder.finish()
+        return builder
+
+    _, dict_time, dict_peak = measure(build_dicts)
+    table, table_time, table_peak = measure(build_table)
+    _, segment_time, segment_peak = measure(segment_table)
+
+    print(f"words: {count}")
+    print(f"list of dicts: {dict_peak / 1024:.0f} KiB peak, {dict_time:.3f}s")
+    print(f"WordTable:     {table_peak / 1024:.0f} KiB peak, {table_time:.3f}s")
+    print(f"segmentation over WordTable: {segment_peak / 1024:.0f} KiB peak, {segment_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
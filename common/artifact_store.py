@@ -0,0 +1,81 @@
+import os
+import time
+import shutil
+import tempfile
+
+# 各タブの出力ファイルを、処理（ジョブ）ごとに別のディレクトリへ書き出すための置き場。
+# 同じファイル名を同時に処理しても上書きし合わない。
+# 新しいジョブを作るたびに、古いジョブ（TTL切れ）と容量上限を超えた分を古い順に消す。
+# 前のジョブの出力を後から読む処理は、先にtouch()して消されないようにする。
+
+JOBS_ROOT = os.environ.get("MOZOCOS_JOBS_DIR", os.path.join(tempfile.gettempdir(), "mozocos_jobs"))
+JOB_TTL_SECONDS = float(os.environ.get("MOZOCOS_JOB_TTL_HOURS", "24")) * 3600
+QUOTA_MB = int(os.environ.get("MOZOCOS_JOBS_QUOTA_MB", "2000"))
+
+
+def new_job(prefix="job"):
+    # 新しいジョブのディレクトリを作ってパスを返す
+    os.makedirs(JOBS_ROOT, exist_ok=True)
+    cleanup()
+    return tempfile.mkdtemp(prefix=f"{prefix}_", dir=JOBS_ROOT)
+
+
+def touch(path):
+    # pathを含むジョブの最終更新時刻を今にする（古い順に消す対象の後ろに回る）
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(JOBS_ROOT))
+    if relative == os.curdir or relative.startswith(os.pardir):
+        return
+    try:
+        os.utime(os.path.join(JOBS_ROOT, relative.split(os.sep)[0]), None)
+    except OSError:
+        pass
+
+
+def job_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _jobs():
+    # (最終更新時刻, サイズ, パス) を古い順に返す
+    jobs = []
+    for entry in os.scandir(JOBS_ROOT):
+        if entry.is_dir():
+            try:
+                jobs.append((entry.stat().st_mtime, job_size(entry.path), entry.path))
+            except OSError:
+                pass
+    return sorted(jobs)
+
+
+def cleanup(ttl_seconds=JOB_TTL_SECONDS, quota_mb=QUOTA_MB):
+    # TTLを過ぎたジョブを消し、残りが容量上限を超えていれば古いジョブから消す
+    if not os.path.isdir(JOBS_ROOT):
+        return 0
+    now = time.time()
+    jobs = _jobs()
+    total = sum(size for _, size, _ in jobs)
+    max_bytes = quota_mb * 1024 * 1024
+    removed = 0
+    for mtime, size, path in jobs:
+        if now - mtime < ttl_seconds and total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    if removed:
+        print(f"Artifact store: removed {removed} old job(s), {total / (1024 * 1024):.1f} MB in use")
+    return removed
+
+
+def usage():
+    if not os.path.isdir(JOBS_ROOT):
+        return {"jobs": 0, "size_mb": 0.0}
+    jobs = _jobs()
+    return {"jobs": len(jobs), "size_mb": round(sum(size for _, size, _ in jobs) / (1024 * 1024), 2)}
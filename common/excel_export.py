@@ -0,0 +1,94 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from common import timestamps
+
+# 字幕のExcel（Subtitlesシート）を書き出す共通処理。Tab1, 2, 3, 7で同じ見た目にする。
+# openpyxlの書き込み専用モードで1行ずつ流し込み、セルの書式は名前付きスタイルを使い回す。
+# 列: ID, Start, End, English Subtitle, Japanese Subtitle（片方の言語だけの場合は4列）
+
+SHEET_NAME = 'Subtitles'
+COLUMN_WIDTHS = {'A': 7, 'B': 25, 'C': 25, 'D': 90, 'E': 90}
+ROW_HEIGHT = 30
+HEADER_ROW_HEIGHT = 15
+
+_THIN = Side(style='thin')
+
+
+def _named_styles():
+    return [
+        NamedStyle(name='subtitle_header', font=Font(bold=True), alignment=Alignment(horizontal='center'),
+                   border=Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN),
+                   fill=PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")),
+        NamedStyle(name='subtitle_id', alignment=Alignment(horizontal='right', vertical='center')),
+        NamedStyle(name='subtitle_time', alignment=Alignment(horizontal='center', vertical='center')),
+        NamedStyle(name='subtitle_text', alignment=Alignment(horizontal='left', vertical='center')),
+    ]
+
+
+# 列ごとのスタイル（A:ID, B,C:時刻, D,E:字幕）
+COLUMN_STYLES = ['subtitle_id', 'subtitle_time', 'subtitle_time', 'subtitle_text', 'subtitle_text']
+
+
+def write_rows(output, headers, rows):
+    # rowsは (ID, Start, End, 字幕...) のイテラブル。outputはパスかファイルオブジェクト。
+    workbook = Workbook(write_only=True)
+    for style in _named_styles():
+        workbook.add_named_style(style)
+    worksheet = workbook.create_sheet(SHEET_NAME)
+    for column, width in COLUMN_WIDTHS.items():
+        worksheet.column_dimensions[column].width = width
+    # 行の高さはシートの既定値で指定し、行ごとに設定しない
+    worksheet.sheet_format.defaultRowHeight = ROW_HEIGHT
+    worksheet.sheet_format.customHeight = True
+    worksheet.row_dimensions[1].height = HEADER_ROW_HEIGHT
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.style = 'subtitle_header'
+        header_cells.append(cell)
+    worksheet.append(header_cells)
+
+    styles = COLUMN_STYLES[:len(headers)]
+    for row in rows:
+        cells = []
+        for value, style in zip(row, styles):
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.style = style
+            cells.append(cell)
+        worksheet.append(cells)
+
+    workbook.save(output)
+    return output
+
+
+def write_dataframe(df, output):
+    # 画面表示用のDataFrameをそのままExcelにする
+    return write_rows(output, list(df.columns), df.itertuples(index=False, name=None))
+
+
+def cue_rows(english=None, japanese=None, format_type='srt', renumber=False):
+    # Cuesから (ID, Start, End, 字幕...) の行を作る。両方ある場合は英語側のID・時刻を使う。
+    # renumber=TrueならIDはファイルの番号ではなく1から順に振る。
+    base = english if english is not None else japanese
+    starts, ends = base.numpy_columns()
+    start_texts = timestamps.format_column(starts, format_type)
+    end_texts = timestamps.format_column(ends, format_type)
+    text_columns = [cues.texts for cues in (english, japanese) if cues is not None]
+    ids = range(1, len(base) + 1) if renumber else base.ids
+    return zip(ids, start_texts, end_texts, *text_columns)
+
+
+def cue_headers(english=None, japanese=None):
+    headers = ['ID', 'Start', 'End']
+    if english is not None:
+        headers.append('English Subtitle')
+    if japanese is not None:
+        headers.append('Japanese Subtitle')
+    return headers
+
+
+def write_cues(output, english=None, japanese=None, format_type='srt', renumber=False):
+    # Cuesから直接Excelにする（DataFrameを作らない）
+    return write_rows(output, cue_headers(english, japanese), cue_rows(english, japanese, format_type, renumber))
@@ -0,0 +1,23 @@
+import os
+
+# Gradioのキューで使う処理枠（スロット）の定義。
+# 重いWhisperの推論は inference 枠、Tab2〜5,7のファイル変換は io 枠、Tab6の音声合成は tts 枠で動かす。
+# 枠ごとに同時実行数が決まっているので、推論が詰まっていても変換系のタブは待たされない。
+# 待ち行列の順番はGradioのキューが各出力に表示し、max_queueを超えた依頼は受け付けない。
+
+SLOTS = {
+    "inference": int(os.environ.get("MOZOCOS_INFERENCE_SLOTS", "1")),
+    "io": int(os.environ.get("MOZOCOS_IO_SLOTS", "8")),
+    "tts": int(os.environ.get("MOZOCOS_TTS_SLOTS", "2")),
+}
+MAX_QUEUE = int(os.environ.get("MOZOCOS_MAX_QUEUE", "32"))
+
+
+def slot(resource):
+    # イベントリスナーに渡す引数（同じ枠のイベントは同時実行数を共有する）
+    return {"concurrency_id": resource, "concurrency_limit": SLOTS[resource]}
+
+
+def configure_queue(blocks):
+    # 枠を指定していないイベント（クリアボタンなど）はio枠と同じ上限で動かす
+    return blocks.queue(max_size=MAX_QUEUE, default_concurrency_limit=SLOTS["io"])
@@ -0,0 +1,130 @@
+import re
+from array import array
+import numpy as np
+from common import timestamps
+
+# SRT/VTTの字幕を1行ずつ読んで解析し、字幕の配列(Cues)にする共通処理。
+# 時刻はミリ秒の整数で持つ（変換はcommon.timestampsで列ごとにまとめて行う）。
+# ミリ秒は1〜3桁（"1,5"は1.500秒）、時間は省略・1桁・2桁のどれでも読める。
+# 字幕の区切りは空行。VTTのヘッダーやNOTEなど、タイムスタンプ行の無いブロックは読み飛ばす。
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, '\u200b\u200c\u200d\ufeff'))
+_TIMING = re.compile(rf'({timestamps.TIME_PATTERN})\s*-->\s*({timestamps.TIME_PATTERN})')
+
+
+class Cues:
+    # 字幕の配列。ID・開始・終了（ミリ秒）は整数配列、本文は文字列のリストで持つ。
+    __slots__ = ("ids", "starts", "ends", "texts")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.texts = []
+
+    def append(self, cue_id, start, end, text):
+        self.ids.append(cue_id)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return zip(self.ids, self.starts, self.ends, self.texts)
+
+    def numpy_columns(self):
+        # コピーせずにnumpy配列として見る（ミリ秒）
+        return np.frombuffer(self.starts, dtype=np.int64), np.frombuffer(self.ends, dtype=np.int64)
+
+    @classmethod
+    def from_columns(cls, ids, starts, ends, texts):
+        cues = cls()
+        cues.ids = array('q', ids)
+        cues.starts.frombytes(np.asarray(starts, dtype=np.int64).tobytes())
+        cues.ends.frombytes(np.asarray(ends, dtype=np.int64).tobytes())
+        cues.texts = list(texts)
+        return cues
+
+
+def _read_block(block, ids, starts, ends, texts):
+    # 空行で区切られた1ブロックを字幕にする。タイムスタンプ行の無いブロック（WEBVTTやNOTE）は読み飛ばす。
+    # 先頭行の次がタイムスタンプ行なら、先頭行は字幕のID（数字でなければ番号を振る）。
+    cue_id = None
+    text_lines = None
+    for index, line in enumerate(block):
+        match = _TIMING.match(line) if '-->' in line else None
+        if match is None:
+            if text_lines is not None:
+                text_lines.append(line)
+            continue
+        if text_lines is not None:
+            # 空行なしで次の字幕が続いている場合。直前の数字だけの行はその字幕のIDとみなす。
+            next_id = int(text_lines.pop()) if text_lines and text_lines[-1].isdecimal() else None
+            texts.append(" ".join(text_lines))
+        elif index == 1:
+            next_id = int(block[0]) if block[0].isdecimal() else None
+        else:
+            next_id = None
+        cue_id = next_id if next_id is not None else len(ids) + 1
+        ids.append(cue_id)
+        starts.append(match.group(1))
+        ends.append(match.group(2))
+        text_lines = []
+    if text_lines is not None:
+        texts.append(" ".join(text_lines))
+
+
+def parse(lines):
+    # linesは行のイテラブル（ファイルオブジェクトでもよい）か文字列
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    ids = []
+    starts = []
+    ends = []
+    texts = []
+    block = []
+    for line in lines:
+        line = line.translate(_ZERO_WIDTH).strip()
+        if line:
+            block.append(line)
+        elif block:
+            _read_block(block, ids, starts, ends, texts)
+            block = []
+    if block:
+        _read_block(block, ids, starts, ends, texts)
+    # 時刻の文字列は最後にまとめてミリ秒にする
+    return Cues.from_columns(ids, timestamps.parse_column(starts), timestamps.parse_column(ends), texts)
+
+
+def parse_file(file_path, encoding='utf-8'):
+    with open(file_path, 'r', encoding=encoding) as f:
+        return parse(f)
+
+
+def _time_columns(cues, format_type):
+    starts, ends = cues.numpy_columns()
+    return timestamps.format_column(starts, format_type), timestamps.format_column(ends, format_type)
+
+
+def _blocks(cues, format_type):
+    # IDは1から振り直す
+    starts, ends = _time_columns(cues, format_type)
+    return [f"{number}\n{start} --> {end}\n{text}\n"
+            for number, start, end, text in zip(range(1, len(cues) + 1), starts, ends, cues.texts)]
+
+
+def to_srt(cues):
+    return "\n".join(_blocks(cues, 'srt'))
+
+
+def to_vtt(cues, header="WEBVTT\n"):
+    return "\n".join([header] + _blocks(cues, 'vtt'))
+
+
+def to_records(cues, format_type='srt'):
+    # 画面表示やExcel用の dict(ID, Start, End, Text) のリスト
+    starts, ends = _time_columns(cues, format_type)
+    return [{'ID': cue_id, 'Start': start, 'End': end, 'Text': text}
+            for cue_id, start, end, text in zip(cues.ids, starts, ends, cues.texts)]
@@ -0,0 +1,97 @@
+import re
+import numpy as np
+
+# 字幕の時刻はミリ秒の整数(int64)で持つ。小数の秒を経由しないので、丸めで "60.000" のような表示にならない。
+# 列（多数の時刻）をまとめて変換する時はNumPyで一括処理する。
+# 書式: srtは "HH:MM:SS,mmm"、vttは "H:MM:SS.mmm"。読む時はミリ秒1〜3桁、時間の省略・桁数違いも受け付ける。
+
+TIME_PATTERN = r'(?:\d+:)?\d{1,2}:\d{2}[,.]\d{1,3}'
+_TIME_PARTS = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})')
+_HOUR_WIDTH = {'srt': 2, 'vtt': 1}
+_SEPARATOR = {'srt': ',', 'vtt': '.'}
+
+
+def seconds_to_ms(seconds):
+    return int(round(seconds * 1000))
+
+
+def parse_time(time_str):
+    # "00:01:02,5" → 62500
+    match = _TIME_PARTS.fullmatch(time_str.strip())
+    if match is None:
+        raise ValueError(f"Unexpected time format: {time_str}")
+    hours, minutes, seconds, fraction = match.groups()
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+
+def format_time(ms, format_type='srt'):
+    hours, rest = divmod(int(ms), 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:0{_HOUR_WIDTH[format_type]}}:{minutes:02}:{seconds:02}{_SEPARATOR[format_type]}{millis:03}"
+
+
+def parse_column(time_strs):
+    # 同じ桁数の "H...:MM:SS,mmm" の列はバイト配列にしてまとめて計算する。形が違うものだけ1つずつ読む。
+    count = len(time_strs)
+    values = np.zeros(count, dtype=np.int64)
+    if count == 0:
+        return values
+    width = len(time_strs[0])
+    hour_digits = width - 10
+    joined = "".join(time_strs)
+    if hour_digits < 1 or not joined.isascii() or any(len(time_str) != width for time_str in time_strs):
+        return np.array([parse_time(time_str) for time_str in time_strs], dtype=np.int64)
+
+    chars = np.frombuffer(joined.encode('ascii'), dtype=np.uint8).reshape(count, width)
+    digits = chars.astype(np.int64) - ord('0')
+    digit_columns = list(range(hour_digits)) + [hour_digits + k for k in (1, 2, 4, 5, 7, 8, 9)]
+    valid = ((digits[:, digit_columns] >= 0) & (digits[:, digit_columns] <= 9)).all(axis=1)
+    valid &= (chars[:, hour_digits] == ord(':')) & (chars[:, hour_digits + 3] == ord(':'))
+    valid &= (chars[:, hour_digits + 6] == ord(',')) | (chars[:, hour_digits + 6] == ord('.'))
+
+    hours = np.zeros(count, dtype=np.int64)
+    for column in range(hour_digits):
+        hours = hours * 10 + digits[:, column]
+    minutes = digits[:, hour_digits + 1] * 10 + digits[:, hour_digits + 2]
+    seconds = digits[:, hour_digits + 4] * 10 + digits[:, hour_digits + 5]
+    millis = digits[:, hour_digits + 7] * 100 + digits[:, hour_digits + 8] * 10 + digits[:, hour_digits + 9]
+    values[:] = ((hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+    for index in np.flatnonzero(~valid):
+        values[index] = parse_time(time_strs[index])
+    return values
+
+
+def format_column(ms_values, format_type='srt'):
+    # ミリ秒の列をまとめて文字列のリストにする。"MM:SS,mmm" の部分はバイト配列で一括に作る。
+    ms_values = np.asarray(ms_values, dtype=np.int64)
+    if len(ms_values) == 0:
+        return []
+    hour_digits = _HOUR_WIDTH[format_type]
+    hours, rest = np.divmod(ms_values, 3600000)
+    minutes, rest = np.divmod(rest, 60000)
+    seconds, millis = np.divmod(rest, 1000)
+
+    wide = hours.max() >= 10 ** hour_digits
+    # 時間が桁に収まる場合は時間の部分も一緒に作る
+    head = 0 if wide else hour_digits
+    chars = np.empty((len(ms_values), head + 10), dtype=np.uint8)
+    for column in range(head):
+        chars[:, column] = hours // 10 ** (head - 1 - column) % 10 + ord('0')
+    chars[:, head] = ord(':')
+    chars[:, head + 1] = minutes // 10 + ord('0')
+    chars[:, head + 2] = minutes % 10 + ord('0')
+    chars[:, head + 3] = ord(':')
+    chars[:, head + 4] = seconds // 10 + ord('0')
+    chars[:, head + 5] = seconds % 10 + ord('0')
+    chars[:, head + 6] = ord(_SEPARATOR[format_type])
+    chars[:, head + 7] = millis // 100 + ord('0')
+    chars[:, head + 8] = millis // 10 % 10 + ord('0')
+    chars[:, head + 9] = millis % 10 + ord('0')
+    width = head + 10
+    formatted = chars.view(f'S{width}').ravel().astype(f'U{width}').tolist()
+    if not wide:
+        return formatted
+    # 桁に収まらない時間（srtで100時間以上など）がある場合は、時間の部分だけ後から付ける
+    return [f"{hour:0{hour_digits}}{tail}" for hour, tail in zip(hours.tolist(), formatted)]
@@ -0,0 +1,31 @@
+import os
+import zipfile
+
+# 出力ファイルをzipにまとめる。
+# メモリ上にある内容はwritestrでそのまま書き込み、書き出したファイルを読み直さない。
+# 圧縮レベルは0（無圧縮）〜9。既定は6（deflate）。
+
+COMPRESS_LEVEL = int(os.environ.get("MOZOCOS_ZIP_LEVEL", "6"))
+
+
+def write_zip(zip_path, members, compress_level=COMPRESS_LEVEL):
+    # membersの要素は (zip内の名前, strかbytes) か、ディスク上にしかないファイルのパス
+    if compress_level > 0:
+        options = {"compression": zipfile.ZIP_DEFLATED, "compresslevel": compress_level}
+    else:
+        options = {"compression": zipfile.ZIP_STORED}
+    with zipfile.ZipFile(zip_path, 'w', **options) as zip_file:
+        for member in members:
+            if isinstance(member, str):
+                zip_file.write(member, os.path.basename(member))
+                continue
+            arcname, data = member
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            zip_file.writestr(arcname, data)
+    return zip_path
+
+
+def members_from(paths, contents):
+    # 書き出し済みの内容(contents: パス→内容)があればそれを使い、なければファイルを読む
+    return [(os.path.basename(path), contents[path]) if contents.get(path) is not None else path for path in paths]
@@ -7,6 +7,7 @@ from tab5 import tab5_func as t5
 from tab6 import tab6_func as t6
 from tab7 import tab7_func as t7
 import pandas as pd
+from common import scheduler
 
 def gr_components():
 
@@ -28,13 +29,27 @@ def gr_components():
                     with gr.Row():
                         exec_btn = gr.Button("データファイルの作成", variant="primary")
                         t1_clear_Button=gr.Button(value='クリア')
+                        t1_stop_Button=gr.Button(value='中止')
                     param2 = gr.Dropdown(["medium", "large", "large-v2", "large-v3", "distil-large-v3"], value="large-v2", label="モデルを選ぶ")
                     param3 = gr.Radio(["int8", "float16", "float32"], value="float32", label="演算方法を選ぶ")
                     param4 = gr.Radio(["英語"], value="英語", label="言語を選ぶ")
                     param5 = gr.Slider(label="ビームサイズ", value=5, minimum=1, maximum=10, step=1)
                     param6 = gr.Checkbox(label="Vad-Filterの使用", value=True)
+                    param12 = gr.CheckboxGroup(t1.OUTPUT_FORMATS, value=t1.DEFAULT_OUTPUTS, label="作成するファイル（SRTは常に作ります）")
+                    param7 = gr.Radio(["auto", "cpu", "cuda"], value="auto", label="デバイスを選ぶ（cpuではint8で動きます）")
+                    with gr.Accordion(label="CPU設定", open=False):
+                        param8 = gr.Slider(label="CPUスレッド数（0はコア数に合わせる）", value=0, minimum=0, maximum=64, step=1)
+                        param9 = gr.Slider(label="ワーカー数", value=1, minimum=1, maximum=8, step=1)
+                    with gr.Accordion(label="長い音声の並列処理", open=False):
+                        param10 = gr.Checkbox(label="無音区間で分割して並列に文字起こしする", value=False)
+                        param11 = gr.Slider(label="並列プロセス数（0は自動: GPUは枚数まで、CPUはメモリ予算内）", value=0, minimum=0, maximum=32, step=1)
                     with gr.Accordion(label="Google翻訳用docs",open=False):
                         doc_download_path=gr.File(label="Wordファイルのダウンロード",file_count="multiple")
+                    with gr.Accordion(label="複数ファイルの一括処理",open=False):
+                        batch_files = gr.File(label="複数のファイルをアップロードしてね", file_count="multiple", type="filepath")
+                        batch_btn = gr.Button("一括でデータファイルを作成", variant="primary")
+                        batch_summary = gr.Textbox(label="処理結果")
+                        batch_download_path = gr.File(label="一括処理のファイル（batch_manifest.jsonを含む）", file_count="multiple")
                     
                     '''with gr.Accordion(label="Json（ワードスタンプ）", open=False):
                         result_json_file = gr.File(label="JSONファイルをダウンロード")
@@ -223,11 +238,21 @@ def gr_components():
                       outputs=[result_srt_content,result_txt_nr_content,result_txt_r_content
                                ,main_files_path,doc_download_path,html_srt,html_nr_txt,html_r_txt,filename_output,dummy,gr_components_df,
                                translate_srt,translate_nr_txt,translate_r_txt,download_translated_files,button2_df])
-        exec_btn.click(
+        transcribe_event = exec_btn.click(
             fn=t1.transcribe,
-            inputs=[param1, param2, param3, param4, param5, param6],
-            outputs=[result_srt_content,result_txt_nr_content, result_txt_r_content, main_files_path,doc_download_path,html_srt,html_nr_txt,html_r_txt,filename_output,dummy,gr_components_df])
+            inputs=[param1, param2, param3, param4, param5, param6, param7, param8, param9, param10, param11, param12],
+            outputs=[result_srt_content,result_txt_nr_content, result_txt_r_content, main_files_path,doc_download_path,html_srt,html_nr_txt,html_r_txt,filename_output,dummy,gr_components_df],
+            **scheduler.slot("inference"))
         
+        # 文字起こしは途中経過を流しながら進むので、中止ボタンで止められる
+        t1_stop_Button.click(fn=None, inputs=None, outputs=None, cancels=[transcribe_event])
+
+        batch_btn.click(
+            fn=t1.transcribe_batch,
+            inputs=[batch_files, param2, param3, param4, param5, param6, param7, param8, param9, param12],
+            outputs=[batch_download_path, batch_summary],
+            **scheduler.slot("inference"))
+
         t1_clear_Button.click(
             fn=t1_clear,inputs=[],outputs=[param1,result_srt_content,result_txt_nr_content,result_txt_r_content,main_files_path,doc_download_path,html_srt,html_nr_txt,html_r_txt,filename_output,dummy,gr_components_df]
         )
@@ -245,25 +270,28 @@ def gr_components():
                     translate_r_txt, 
                     extension_choices,
                     dummy],
-            outputs=[download_translated_files,button2_df]) 
+            outputs=[download_translated_files,button2_df],
+            **scheduler.slot("io"))
         t2_clear_button.click(fn=t2_clear,inputs=[],outputs=[translate_srt,translate_nr_txt,translate_r_txt,download_translated_files,button2_df])
         ### Tab3 イベントリスナー　###
         submit_button.click(
                 fn=process_files,
                 inputs=[english_file, japanese_file, lang_for_xls_choice],
-                outputs=[dataframe_output, excel_output]
+                outputs=[dataframe_output, excel_output],
+                **scheduler.slot("io")
             )
 
         ### Tab4 イベントリスナー ###
-        file_input.change(fn=t4.display_file_content, inputs=file_input, outputs=[file_content, translated_text, output_file])
-        translate_button.click(fn=t4.translate, inputs=[file_input, translated_text], outputs=output_file)
+        file_input.change(fn=t4.display_file_content, inputs=file_input, outputs=[file_content, translated_text, output_file], **scheduler.slot("io"))
+        translate_button.click(fn=t4.translate, inputs=[file_input, translated_text], outputs=output_file, **scheduler.slot("io"))
 
         t4_clear_button.click(fn=t4_clear,inputs=[],outputs=[file_input,file_content,translated_text,output_file])
         ### Tab5 イベントリスナー ###
         to_srttxt_button.click(
         fn=t5.convert_docx_to_srttxt,
         inputs=to_srttxt_input,
-        outputs=to_srttxt_output
+        outputs=to_srttxt_output,
+        **scheduler.slot("io")
         )
         
         to_srttxt_clear_button.click(
@@ -272,13 +300,14 @@ def gr_components():
             outputs=[to_srttxt_input, to_srttxt_output]
         )
 
-        submit_transform_button.click(t5.process_doc_files, inputs=various_file_input, outputs=output_doc_files)
+        submit_transform_button.click(t5.process_doc_files, inputs=various_file_input, outputs=output_doc_files, **scheduler.slot("io"))
         clear_transform_button.click(t5.clear_both, inputs=None, outputs=[various_file_input, output_doc_files])   
         ### Tab6 イベントリスナー ###
         generate_voice.click(
             fn=t6.tts,
             inputs=[input_audio,voice_select],
-            outputs=[output_audio,download_audio] )
+            outputs=[output_audio,download_audio],
+            **scheduler.slot("tts"))
         t6_clear_button.click(
             fn=t6_clear,
             inputs=[],
@@ -286,12 +315,14 @@ def gr_components():
         )
         ### Tab7 イベントリスナー ###
         vtt_input.upload(
-        fn=t7.process_file, inputs=[vtt_input], outputs=[vtt_output_1, vtt_output_2,dummy_file]
+        fn=t7.process_file, inputs=[vtt_input], outputs=[vtt_output_1, vtt_output_2,dummy_file],
+        **scheduler.slot("io")
     )
         t7_translate_button.click(
             fn=t7.vtt_translate,
             inputs=[vtt_input, vtt_translated_content,dummy_file],
-            outputs=[vtt_translated_file]
+            outputs=[vtt_translated_file],
+            **scheduler.slot("io")
         )
         t7_clear_button.click(
             fn=t7_clear,
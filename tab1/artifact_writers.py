@@ -0,0 +1,96 @@
+import io
+import os
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from docx import Document
+from common import zip_packager
+
+# 出力ファイルを1つずつ独立したタスクとして作り、スレッドプールで並行に書き出す。
+# writeは出力先のパスを受け取ってファイルを書く関数。書いた内容（str/bytes）を返すと、zipを作る時に読み直さずに使える。
+
+Writer = namedtuple("Writer", ["name", "path", "write"])
+
+MAX_WORKERS = int(os.environ.get("MOZOCOS_WRITER_THREADS", "4"))
+
+
+def text_writer(name, path, content):
+    def write(output_path):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return content
+    return Writer(name, path, write)
+
+
+def json_records_writer(name, path, records):
+    # json.dump(list, indent=4)と同じ形で、リストを作らずに1件ずつ書き出す
+    def write(output_path):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("[")
+            first = True
+            for record in records:
+                f.write("\n    " if first else ",\n    ")
+                f.write(json.dumps(record, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+                first = False
+            f.write("]" if first else "\n]")
+    return Writer(name, path, write)
+
+
+def buffered_writer(name, path, render):
+    # renderはファイルオブジェクトに書く関数。メモリ上に作ってからファイルに書き、内容(bytes)を返す。
+    def write(output_path):
+        buffer = io.BytesIO()
+        render(buffer)
+        data = buffer.getvalue()
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return data
+    return Writer(name, path, write)
+
+
+def srt_docx_writer(name, path, srt_entries):
+    def render(output):
+        doc = Document()
+        for index, entry in enumerate(srt_entries):
+            if index > 0:
+                doc.add_paragraph()  # 空行で区切る
+            doc.add_paragraph(f'{entry["ID"]}')
+            doc.add_paragraph(f'{entry["Start"]} --> {entry["End"]}')
+            doc.add_paragraph(entry["Text"])
+        doc.save(output)
+    return buffered_writer(name, path, render)
+
+
+def text_docx_writer(name, path, content):
+    def render(output):
+        doc = Document()
+        for line in content.splitlines(keepends=True):
+            doc.add_paragraph(line)
+        doc.save(output)
+    return buffered_writer(name, path, render)
+
+
+def zip_writer(name, path, members):
+    # membersはzip_packager.write_zipと同じ形（(名前, 内容) かファイルのパス）
+    def write(output_path):
+        zip_packager.write_zip(output_path, members)
+    return Writer(name, path, write)
+
+
+def _run(writer):
+    start = time.perf_counter()
+    content = writer.write(writer.path)
+    return writer, time.perf_counter() - start, content
+
+
+def run_writers(writers, max_workers=MAX_WORKERS):
+    # 全てのwriterを並行に実行し、writerごとの所要時間を記録する。書いた内容をパスごとに返す。
+    timings = {}
+    contents = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for writer, elapsed, content in executor.map(_run, writers):
+            timings[writer.name] = elapsed
+            contents[writer.path] = content
+    print("Writer timings: " + ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in timings.items()))
+    return contents
@@ -0,0 +1,44 @@
+import os
+import numpy as np
+from faster_whisper.audio import decode_audio
+from tab1 import cache_utils
+
+# 入力ファイルを16kHzモノラルのfloat32に1回だけデコードし、ハッシュ名の.npyとして保存する。
+# 2回目以降はffmpegを通さず、メモリマップで読み込んだ配列をそのまま使う。
+
+SAMPLING_RATE = 16000
+DEFAULT_MAX_MB = int(os.environ.get("MOZOCOS_AUDIO_CACHE_MB", "4000"))
+
+stats = {"hits": 0, "misses": 0}
+
+
+def _path(file_path):
+    return os.path.join(cache_utils.cache_dir("audio"), f"{cache_utils.file_digest(file_path)}.npy")
+
+
+def load_audio(file_path, max_mb=DEFAULT_MAX_MB):
+    path = _path(file_path)
+    if os.path.exists(path):
+        stats["hits"] += 1
+        cache_utils.touch(path)
+        return np.load(path, mmap_mode='r')
+
+    stats["misses"] += 1
+    audio = decode_audio(file_path, sampling_rate=SAMPLING_RATE)
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, audio.astype(np.float32, copy=False))
+    os.replace(tmp_path, path)
+    cache_utils.evict_lru(os.path.dirname(path), max_mb * 1024 * 1024)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r')
+    # 予算より大きくて残せなかった場合はデコードした配列をそのまま使う
+    return audio
+
+
+def cached_duration(file_path):
+    # デコード済みならヘッダーだけ読んで長さを返す。無ければNone。
+    path = _path(file_path)
+    if not os.path.exists(path):
+        return None
+    audio = np.load(path, mmap_mode='r')
+    return len(audio) / SAMPLING_RATE
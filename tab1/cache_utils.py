@@ -0,0 +1,81 @@
+import os
+import hashlib
+import tempfile
+
+# tab1のキャッシュ（文字起こし結果など）で共通に使う関数。
+
+CACHE_ROOT = os.environ.get("MOZOCOS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mozocos_cache"))
+
+_digest_cache = {}
+
+
+def cache_dir(name):
+    path = os.path.join(CACHE_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    # ファイル全体を読み込まずにストリームでsha256を計算する。同じファイルは再計算しない。
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+    if memo_key in _digest_cache:
+        return _digest_cache[memo_key]
+
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    _digest_cache[memo_key] = digest
+    return digest
+
+
+def params_key(*parts):
+    return hashlib.sha256("|".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def touch(path):
+    # LRU判定用に最終利用時刻を更新する
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _cached_files(directory):
+    # (パス, サイズ, 最終利用時刻) のリスト。書き込み中の一時ファイル(*.tmp*)は含めない。
+    # 他のスレッドが同時に置き換え・削除したファイルは読み飛ばす。
+    files = []
+    for entry in os.scandir(directory):
+        if ".tmp" in entry.name:
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((entry.path, stat.st_size, stat.st_mtime))
+    return files
+
+
+def directory_size(directory):
+    return sum(size for _, size, _ in _cached_files(directory))
+
+
+def evict_lru(directory, max_bytes):
+    # 合計サイズがmax_bytesに収まるまで、最も古く使われたファイルから消す
+    files = _cached_files(directory)
+    total = sum(size for _, size, _ in files)
+    evicted = 0
+    for path, size, _ in sorted(files, key=lambda item: item[2]):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            evicted += 1
+        except OSError:
+            pass
+    return evicted
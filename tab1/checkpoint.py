@@ -0,0 +1,62 @@
+import os
+import json
+import time
+from tab1 import cache_utils
+from tab1 import audio_cache
+from tab1.word_table import WordTable
+
+# 長い音声の文字起こし途中経過を、定期的にサイドカーファイルへ保存する。
+# 処理が落ちても、次の実行では保存済みの単語を読み込み、最後のセグメントの終了時刻から再開する。
+
+SAMPLING_RATE = 16000
+CHECKPOINT_INTERVAL = float(os.environ.get("MOZOCOS_CHECKPOINT_INTERVAL", "60"))
+
+
+def _path(key):
+    return os.path.join(cache_utils.cache_dir("checkpoints"), f"{key}.json")
+
+
+def load(key):
+    try:
+        with open(_path(key), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return WordTable.from_columns(data["columns"]), data["offset"]
+
+
+def save(key, words_data, offset):
+    path = _path(key)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"offset": offset, "columns": words_data.to_columns()}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def remove(key):
+    try:
+        os.remove(_path(key))
+    except OSError:
+        pass
+
+
+def audio_from(file_path, offset):
+    # offset秒より後ろの音声だけを返す
+    audio = audio_cache.load_audio(file_path)
+    return audio[int(offset * SAMPLING_RATE):]
+
+
+class Checkpointer:
+    # 一定時間ごとに途中経過を保存する
+    def __init__(self, key, interval=CHECKPOINT_INTERVAL):
+        self.key = key
+        self.interval = interval
+        self.last_save_time = time.perf_counter()
+
+    def maybe_save(self, words_data, offset):
+        if time.perf_counter() - self.last_save_time >= self.interval:
+            save(self.key, words_data, offset)
+            self.last_save_time = time.perf_counter()
+
+    def finish(self):
+        remove(self.key)
@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+import ctranslate2
+from collections import OrderedDict
+from faster_whisper import WhisperModel
+
+# WhisperModelをプロセス内で使い回すためのレジストリ。
+# キーは (モデル名, device, compute_type)。メモリ予算を超えたら古いものから捨てる(LRU)。
+
+# モデルのおおよそのサイズ(MB, float16基準)。予算計算にだけ使う。
+MODEL_SIZE_MB = {
+    "tiny": 75,
+    "base": 145,
+    "small": 485,
+    "medium": 1530,
+    "large": 3090,
+    "large-v2": 3090,
+    "large-v3": 3090,
+    "distil-large-v3": 1510,
+}
+COMPUTE_TYPE_FACTOR = {"int8": 0.5, "int8_float16": 0.5, "float16": 1.0, "float32": 2.0}
+
+DEFAULT_BUDGET_MB = int(os.environ.get("MOZOCOS_MODEL_BUDGET_MB", "8000"))
+
+
+def estimate_model_mb(model_name, compute_type):
+    base = MODEL_SIZE_MB.get(model_name, 3090)
+    return int(base * COMPUTE_TYPE_FACTOR.get(compute_type, 1.0))
+
+
+class ModelRegistry:
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()  # key -> (model, size_mb)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, model_name, device="cuda", compute_type="float32", **kwargs):
+        key = (model_name, device, compute_type) + tuple(sorted(kwargs.items()))
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+
+            self.misses += 1
+            size_mb = estimate_model_mb(model_name, compute_type)
+            self._evict(size_mb)
+
+            start = time.perf_counter()
+            model = WhisperModel(model_name, device=device, compute_type=compute_type, **kwargs)
+            elapsed = time.perf_counter() - start
+            self.load_seconds += elapsed
+            print(f"Loaded {model_name} ({device}, {compute_type}) in {elapsed:.1f}s")
+
+            self._models[key] = (model, size_mb)
+            return model
+
+    def _evict(self, incoming_mb):
+        # 予算に収まるまで最も古いモデルを捨てる。1つしか無ければ予算超過でも残さない。
+        while self._models and self.used_mb() + incoming_mb > self.budget_mb:
+            key, (model, _) = self._models.popitem(last=False)
+            del model
+            self.evictions += 1
+            print(f"Evicted model {key}")
+
+    def used_mb(self):
+        return sum(size for _, size in self._models.values())
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+                "loaded": [list(key) for key in self._models],
+                "used_mb": self.used_mb(),
+                "budget_mb": self.budget_mb,
+            }
+
+
+def resolve_device(mode="auto", compute_type="float32", cpu_threads=0, num_workers=1):
+    # auto: GPUがあればcuda、無ければcpu。cpuではint8で動かす。
+    if mode == "auto":
+        device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    elif mode in ("cpu", "cuda"):
+        device = mode
+    else:
+        raise ValueError(f"Unsupported device mode: {mode}")
+
+    num_workers = max(1, int(num_workers))
+    kwargs = {"num_workers": num_workers}
+    if device == "cpu":
+        compute_type = "int8"
+        # CTranslate2はnum_workers × cpu_threads のスレッドを使うので、自動ではコアをワーカーで分ける
+        kwargs["cpu_threads"] = int(cpu_threads) if cpu_threads else max(1, (os.cpu_count() or 1) // num_workers)
+    return device, compute_type, kwargs
+
+
+registry = ModelRegistry()
+
+
+def get_model(model_name, device="cuda", compute_type="float32", **kwargs):
+    return registry.get(model_name, device=device, compute_type=compute_type, **kwargs)
+
+
+def registry_stats():
+    return registry.stats()
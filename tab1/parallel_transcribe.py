@@ -0,0 +1,162 @@
+import os
+import threading
+import multiprocessing
+import ctranslate2
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from faster_whisper.vad import get_speech_timestamps, VadOptions
+from tab1 import model_registry
+from tab1 import audio_cache
+from tab1 import vad_cache
+from tab1.word_table import WordTable
+
+# 長い音声をVADの無音区間で分割し、プロセスプールで並列に文字起こしする。
+# 各ワーカーは自分のモデルを1つ持ち、結果は元の時間軸に戻してから結合する。
+
+SAMPLING_RATE = 16000
+
+_worker_model = None
+
+# プールはリクエストをまたいで使い回し、ワーカーのモデルロードを1回だけにする
+_pool = None
+_pool_key = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def plan_chunks(audio, chunk_seconds=600, speech_timestamps=None):
+    # 発話区間をつなげていき、chunk_secondsを超えたところで無音区間の中央で切る。
+    if speech_timestamps is None:
+        speech_timestamps = get_speech_timestamps(audio, VadOptions())
+    total = len(audio)
+    if not speech_timestamps:
+        return [(0, total)]
+
+    target = int(chunk_seconds * SAMPLING_RATE)
+    chunks = []
+    chunk_start = 0
+    for current, following in zip(speech_timestamps, speech_timestamps[1:]):
+        if current["end"] - chunk_start >= target:
+            cut = (current["end"] + following["start"]) // 2
+            chunks.append((chunk_start, cut))
+            chunk_start = cut
+    chunks.append((chunk_start, total))
+    return chunks
+
+
+def chunk_speech(speech_timestamps, chunk_start, chunk_end):
+    # チャンク内の発話区間を、チャンク先頭からのサンプル位置にする
+    speech = []
+    for chunk in speech_timestamps:
+        start = max(chunk["start"], chunk_start)
+        end = min(chunk["end"], chunk_end)
+        if start < end:
+            speech.append({"start": start - chunk_start, "end": end - chunk_start})
+    return speech
+
+
+def plan_workers(device, model_name, compute_type, workers=0):
+    # cudaではGPU1枚に1プロセスまで（同じGPUに何個もモデルを載せるとメモリが足りなくなる）。
+    # cpuで0（自動）の場合は、モデルのメモリ予算に収まる数とコア数の小さい方にする。
+    if device == "cuda":
+        gpus = max(1, ctranslate2.get_cuda_device_count())
+        return min(workers or gpus, gpus)
+    if workers:
+        return workers
+    fits = model_registry.DEFAULT_BUDGET_MB // model_registry.estimate_model_mb(model_name, compute_type)
+    return max(1, min(os.cpu_count() or 1, fits))
+
+
+def _init_worker(model_name, device, compute_type, model_kwargs, device_indexes):
+    global _worker_model
+    if device_indexes is not None:
+        # 各ワーカーに別々のGPUを割り当てる
+        model_kwargs = dict(model_kwargs, device_index=device_indexes.get())
+    _worker_model = model_registry.get_model(model_name, device=device, compute_type=compute_type, **model_kwargs)
+
+
+def _get_pool(model_name, device, compute_type, workers):
+    # 同じモデル・条件でワーカー数が足りていれば前回のプールを使う
+    global _pool, _pool_key, _pool_workers
+    key = (model_name, device, compute_type)
+    if _pool is not None and _pool_key == key and _pool_workers >= workers:
+        return _pool
+    shutdown_pool()
+
+    # CPUではコアをワーカー間で分け合う
+    model_kwargs = {}
+    if device == "cpu":
+        model_kwargs["cpu_threads"] = max(1, (os.cpu_count() or 1) // workers)
+    # CUDAを使うためforkではなくspawnで起動する
+    context = multiprocessing.get_context("spawn")
+    device_indexes = None
+    if device == "cuda":
+        device_indexes = context.Queue()
+        for index in range(workers):
+            device_indexes.put(index)
+    _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                initargs=(model_name, device, compute_type, model_kwargs, device_indexes))
+    _pool_key = key
+    _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_key, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+    _pool_key = None
+    _pool_workers = 0
+
+
+def _transcribe_chunk(chunk_audio, offset, lang, beam_size, speech):
+    # speechがNoneならVADを使わない。リストならその発話区間だけを処理する。
+    options = dict(word_timestamps=True, beam_size=beam_size, initial_prompt="Hello, I am Scott.", language=lang)
+    if speech is None:
+        segments, _ = _worker_model.transcribe(chunk_audio, vad_filter=False, **options)
+    elif not speech:
+        return []
+    else:
+        segments, _ = vad_cache.transcribe_speech(_worker_model, chunk_audio, speech, **options)
+    words = []
+    for segment in segments:
+        for word in segment.words:
+            words.append((word.start + offset, word.end + offset, word.word))
+    return words
+
+
+def transcribe_parallel(file_path, model_name, device, compute_type, lang, beam_size, vad_filter,
+                        workers=0, chunk_seconds=600, progress=None):
+    audio = audio_cache.load_audio(file_path)
+    # 発話区間は保存済みのものを使う
+    speech = vad_cache.get_speech_timestamps_cached(file_path, audio)
+    chunks = plan_chunks(audio, chunk_seconds, speech)
+
+    workers = plan_workers(device, model_name, compute_type, workers)
+    workers = max(1, min(workers, len(chunks)))
+
+    results = [None] * len(chunks)
+    with _pool_lock:
+        executor = _get_pool(model_name, device, compute_type, workers)
+        try:
+            futures = {}
+            for index, (start, end) in enumerate(chunks):
+                chunk = chunk_speech(speech, start, end) if vad_filter else None
+                future = executor.submit(_transcribe_chunk, audio[start:end], start / SAMPLING_RATE, lang, beam_size, chunk)
+                futures[future] = index
+
+            done = 0
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += 1
+                if progress is not None:
+                    progress(done / len(chunks))
+        except Exception:
+            # ワーカーが落ちたプールは使えないので作り直す
+            shutdown_pool()
+            raise
+
+    words_data = WordTable()
+    for chunk_words in results:
+        words_data.extend(chunk_words)
+    return words_data, len(audio) / SAMPLING_RATE
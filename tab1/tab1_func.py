@@ -1,24 +1,58 @@
 import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
-import tempfile
 import json
+import subprocess
 from pydub import AudioSegment
 import gradio as gr
-from faster_whisper import WhisperModel
-import zipfile
-from docx import Document
-import re
-from openpyxl.styles import Alignment, Font, PatternFill
+from tab1 import model_registry
+from tab1 import parallel_transcribe
+from tab1 import transcript_cache
+from tab1 import artifact_writers as aw
+from tab1 import checkpoint
+from tab1 import audio_cache
+from tab1 import vad_cache
+from tab1.word_table import WordTable
+from common import abbreviations
+from common import artifact_store
+from common import zip_packager
+from common import subtitles
+from common import timestamps
+from common import excel_export
+import time
 import pandas as pd
 from tqdm import tqdm
 
+_duration_cache = {}
+
+# ffprobeでコンテナのメタデータから長さを読む。全体をデコードしないので速い。
+def probe_audio_duration(file_path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+        capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
+
 def get_audio_duration(File):
     try:
         file_path_str = File.name if hasattr(File, 'name') else File
         if not os.path.exists(file_path_str):
             return "File does not exist"
-        audio = AudioSegment.from_file(file_path_str)
-        duration = len(audio) / 1000.0
+        stat = os.stat(file_path_str)
+        cache_key = (os.path.abspath(file_path_str), stat.st_size, stat.st_mtime)
+        if cache_key in _duration_cache:
+            return _duration_cache[cache_key]
+        # デコード済みの音声があればその長さを使う
+        duration = audio_cache.cached_duration(file_path_str)
+        if duration is not None:
+            _duration_cache[cache_key] = duration
+            return duration
+        try:
+            duration = probe_audio_duration(file_path_str)
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            # ffprobeが使えない時だけpydubで全体をデコードする
+            audio = AudioSegment.from_file(file_path_str)
+            duration = len(audio) / 1000.0
+        _duration_cache[cache_key] = duration
         return duration
     except AttributeError as e:
         return f"AttributeError occurred: {e}"
@@ -26,32 +60,25 @@ def get_audio_duration(File):
         return f"An error occurred: {e}"
 
 def format_timestamp(seconds):
-    hrs, secs = divmod(seconds, 3600)
-    mins, secs = divmod(secs, 60)
-    millis = int((secs % 1) * 1000)
-    return f"{int(hrs):02}:{int(mins):02}:{int(secs):02},{millis:03}"
+    return timestamps.format_time(timestamps.seconds_to_ms(seconds), 'srt')
 
 #dataframe追加
 def parse_srt_c(srt_content):
-    pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)\n\n'
-    matches = re.findall(pattern, srt_content, re.DOTALL)
-    
-    subtitles = []
-    for match in matches:
-        subtitles.append({
-            'ID': int(match[0]),
-            'Start': match[1],
-            'End': match[2],
-            'Text': match[3].replace('\n', ' ')
-        })
-    
-    return subtitles
+    return subtitles.to_records(subtitles.parse(srt_content), 'srt')
 
 # SRTファイルからExcelファイルを作成する関数
-def create_excel_from_srt_c(srt_content, input_file_name='Noname'):
+def create_excel_from_srt_c(srt_content, input_file_name='Noname', output_dir=None):
+    return create_excel_from_subtitles(parse_srt_c(srt_content), input_file_name, output_dir)
+
+# 字幕のリスト(ID,Start,End,Text)からExcelファイルを作成する関数
+def create_excel_from_subtitles(english_subtitles, input_file_name='Noname', output_dir=None):
     excel_file_name = f"{input_file_name}_en.xlsx"
-    english_subtitles = parse_srt_c(srt_content)
+    df = subtitles_dataframe(english_subtitles)
+    excel_file_path = os.path.join(output_dir or artifact_store.new_job("tab1"), excel_file_name)
+    excel_export.write_dataframe(df, excel_file_path)
+    return excel_file_path, df
 
+def subtitles_dataframe(english_subtitles):
     data = []
     for eng in english_subtitles:
         data.append({
@@ -60,320 +87,412 @@ def create_excel_from_srt_c(srt_content, input_file_name='Noname'):
             'End': eng['End'],
             'English Subtitle': eng['Text']
         })
-
-    df = pd.DataFrame(data)
-    temp_dir = tempfile.gettempdir()
-    excel_file_path = os.path.join(temp_dir, excel_file_name)
-    
-    with pd.ExcelWriter(excel_file_path, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Subtitles')
-        workbook = writer.book
-        worksheet = writer.sheets['Subtitles']
-
-        column_widths = {'A': 7, 'B': 25, 'C': 25, 'D': 90, 'E': 90}
-        for column, width in column_widths.items():
-            worksheet.column_dimensions[column].width = width
-
-        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-            for cell in row:
-                if cell.column_letter == 'A':
-                    cell.alignment = Alignment(horizontal='right', vertical='center')
-                elif cell.column_letter in ['B', 'C']:
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                elif cell.column_letter in ['D', 'E']:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-
-        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-            worksheet.row_dimensions[row[0].row].height = 30
-
-        header_font = Font(bold=True)
-        for cell in worksheet["1:1"]:
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-            cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
-
-    return excel_file_path, df
+    return pd.DataFrame(data)
 
 '''def exe_for_gradio(srt_content, input_file_name='Noname'):
     excel_filepath, df_display = create_excel_from_srt_c(srt_content, input_file_name)
     return df_display'''
 
-def transcribe(File, Model, Computing, Lang, BeamSize, VadFilter, progress=gr.Progress()):
+# VADを使う場合、保存済みの発話区間を使って文字起こしし、VADの再計算を省く。
+# 発話が見つからない場合はfaster_whisper側のVADに任せる。
+def transcribe_audio(model, File, audio, VadFilter, **kwargs):
+    if not VadFilter:
+        return model.transcribe(audio, vad_filter=False, **kwargs)
+    speech = vad_cache.get_speech_timestamps_cached(File, audio)
+    if not speech:
+        return model.transcribe(audio, vad_filter=True, **kwargs)
+    return vad_cache.transcribe_speech(model, audio, speech, **kwargs)
+
+# セグメントごとに(セグメントの終了時刻, (start, end, word)のリスト)を返す。offset秒だけ時刻をずらす。
+# 進捗バーの更新もここで行う。
+def stream_words(segments, total_duration, progress, offset=0.0):
+    # Initialize tqdm progress bar
+    progress_bar = tqdm(total=total_duration, unit="s", position=0, leave=True, desc="処理進行状況")
+    last_update_time = 0
+
+    # 初期更新
+    progress(0)
+    progress_bar.update(0)
+
+    for segment in segments:
+        yield segment.end + offset, [(word.start + offset, word.end + offset, word.word) for word in segment.words]
+    
+        # Update progress at a reasonable frequency
+        segment_progress = segment.end - last_update_time
+        if segment_progress >= 1.0:  # Update every 1 second
+            progress_bar.update(segment_progress)
+            progress(segment.end / total_duration)
+            last_update_time = segment.end        
+            progress_bar.set_postfix({"progress": segment.end / total_duration * 100})
+
+    progress_bar.update(total_duration - last_update_time)
+    progress(1.0)  # Ensure progress is 100% at the end
+    # Close tqdm progress bar
+    progress_bar.close()
+
+def collect_words(segments, total_duration, progress):
+    words_data = WordTable()
+    for _, segment_words in stream_words(segments, total_duration, progress):
+        words_data.extend(segment_words)
+    return words_data
+
+# 文字起こし中に途中経過のSRT/TXT(NR,R)を組み立てる。ピリオドで文が閉じるたびにSRTのエントリが増える。
+class TranscriptBuilder:
+    # 文字列の+=は長い文字起こしで遅くなるので、部品をリストに貯めて最後にjoinする
+    def __init__(self):
+        self.srt_entries = []
+        self.srt_blocks = []
+        self.segment_parts = []
+        self.segment_start = None
+        self.segment_end = None
+        self.nr_parts = []
+        self.nr_has_text = False
+        self.r_parts = []
+        self.r_at_line_start = False
+        self.previous_word_end = 0
+        self.is_first_word = True
+
+    def add_word(self, start, end, word):
+        word = protect_abbreviations(word)
+
+        nr_piece = word if self.nr_has_text else word.lstrip()
+        self.nr_parts.append(nr_piece)
+        self.nr_has_text = self.nr_has_text or bool(nr_piece)
+
+        # 行頭（最初の単語か、直前で改行した）なら前後の空白を落とす
+        r_piece = word.strip() if self.is_first_word or self.r_at_line_start else word
+        self.r_parts.append(r_piece)
+        if r_piece:
+            self.r_at_line_start = r_piece.endswith("\n")
+        if "." in word:
+            if start - self.previous_word_end >= 0.5:
+                self.r_parts.append("\n")
+                self.r_at_line_start = True
+            self.previous_word_end = end
+        self.is_first_word = False
+
+        if self.segment_start is None:
+            self.segment_start = start
+        self.segment_parts.append(word)
+        self.segment_end = end
+        if word.endswith('.'):
+            self._close_segment("".join(self.segment_parts).strip())
+            return True
+        return False
+
+    # 最後の文がピリオドで終わっていない場合も1つのエントリにする
+    def finish(self):
+        text = "".join(self.segment_parts).strip()
+        if text:
+            self._close_segment(text)
+
+    def _close_segment(self, text):
+        number = len(self.srt_entries) + 1
+        start_time = format_timestamp(self.segment_start)
+        end_time = format_timestamp(self.segment_end)
+        text = restore_abbreviations(text)
+        self.srt_entries.append({'ID': number, 'Start': start_time, 'End': end_time, 'Text': text})
+        self.srt_blocks.append(f"{number}\n{start_time} --> {end_time}\n{text}\n\n")
+        self.segment_parts = []
+        self.segment_start = None
+
+    def srt_text(self):
+        return "".join(self.srt_blocks)
+
+    def nr_text(self):
+        return restore_abbreviations("".join(self.nr_parts))
+
+    def r_text(self):
+        return restore_abbreviations("".join(self.r_parts))
+
+# 略語のピリオド（Dr. など）で文が切れないように保護・復元する。表はtab7と共通。
+def protect_abbreviations(word):
+    return abbreviations.protect(word)
+
+def restore_abbreviations(text):
+    return abbreviations.restore(text)
+
+# 作成できる出力形式。SRTは常に作る。
+OUTPUT_FORMATS = ["TXT(NR,R)", "Word(docx)", "Excel", "ZIP", "JSON"]
+DEFAULT_OUTPUTS = ["TXT(NR,R)", "Word(docx)", "Excel", "ZIP"]
+
+# words_dataから選ばれた出力ファイル(srt,txt,docx,xlsx,zip,json)を作る。
+# 文のリストは1回だけ組み立て、各ファイルにはメモリ上の内容を直接渡す（書いたファイルを読み直さない）。
+def create_output_files(words_data, File, Outputs=None, output_dir=None):
+    if Outputs is None:
+        Outputs = OUTPUT_FORMATS
+    builder = TranscriptBuilder()
+    for start, end, word in words_data:
+        builder.add_word(start, end, word)
+    builder.finish()
+
+    srt_content = builder.srt_text()
+    txt_nr_content = builder.nr_text()
+    txt_r_content = builder.r_text()
+
+    input_file_name = os.path.splitext(os.path.basename(File))[0]
+    # 出力先の指定がなければ、このジョブ専用のディレクトリに書き出す
+    temp_dir = output_dir or artifact_store.new_job("tab1")
+
+    json_output_path = os.path.join(temp_dir, f"{input_file_name}.json")
+    srt_output_path = os.path.join(temp_dir, f"{input_file_name}.srt")
+    txt_nr_output_path = os.path.join(temp_dir, f"{input_file_name}_NR.txt")
+    txt_r_output_path = os.path.join(temp_dir, f"{input_file_name}_R.txt")
+    srtdoc_output_path = os.path.join(temp_dir, f"{input_file_name}_srt.docx")
+    txtdoc_nr_output_path = os.path.join(temp_dir, f"{input_file_name}_txtnr.docx")
+    txtdoc_r_output_path = os.path.join(temp_dir, f"{input_file_name}_txtr.docx")
+    excel_filepath = os.path.join(temp_dir, f"{input_file_name}_en.xlsx")
+    zip_core_file_path = os.path.join(temp_dir, f"{input_file_name}_core.zip")
+    zip_doc_file_path = os.path.join(temp_dir, f"{input_file_name}_docx_en.zip")
+
+    # dfは画面表示とTab2で使うので、Excelを作らない場合も用意する
+    df_display = subtitles_dataframe(builder.srt_entries)
+
+    # 選ばれた形式だけ作る。SRTはTab2でも使うので常に作る。
+    writers = [aw.text_writer("srt", srt_output_path, srt_content)]
+    main_files = [srt_output_path]
+    doc_files = []
+    if "JSON" in Outputs:
+        # 単語表から1件ずつ書き出す
+        writers.append(aw.json_records_writer("json", json_output_path, words_data.records()))
+        main_files.append(json_output_path)
+    if "TXT(NR,R)" in Outputs:
+        writers.append(aw.text_writer("txt_nr", txt_nr_output_path, txt_nr_content))
+        writers.append(aw.text_writer("txt_r", txt_r_output_path, txt_r_content))
+        main_files += [txt_nr_output_path, txt_r_output_path]
+    if "Excel" in Outputs:
+        #xls追加（srtを解析し直さず、文のリストから作る）
+        writers.append(aw.buffered_writer("xlsx", excel_filepath, lambda output: excel_export.write_dataframe(df_display, output)))
+        main_files.append(excel_filepath)
+    if "Word(docx)" in Outputs:
+        writers.append(aw.srt_docx_writer("srt_docx", srtdoc_output_path, builder.srt_entries))
+        writers.append(aw.text_docx_writer("txtnr_docx", txtdoc_nr_output_path, txt_nr_content))
+        writers.append(aw.text_docx_writer("txtr_docx", txtdoc_r_output_path, txt_r_content))
+        doc_files += [srtdoc_output_path, txtdoc_nr_output_path, txtdoc_r_output_path]
+
+    # 各ファイルは互いに独立しているので並行に作る。zipはその後でまとめる。
+    contents = aw.run_writers(writers)
+
+    if "ZIP" in Outputs:
+        # zipファイルにまとめる(srt,json,txtr,txtnr,xlsx)と(doc)。書いたファイルは読み直さず、メモリ上の内容を使う。
+        zip_writers = [aw.zip_writer("core_zip", zip_core_file_path, zip_packager.members_from(main_files, contents))]
+        main_files.append(zip_core_file_path)
+        if doc_files:
+            zip_writers.append(aw.zip_writer("docx_zip", zip_doc_file_path, zip_packager.members_from(doc_files, contents)))
+            doc_files.append(zip_doc_file_path)
+        aw.run_writers(zip_writers)
+
+    print(f"Processed {File}")
+
+    html_srt = f"""<pre style="white-space: pre-wrap; overflow-y: auto; height: 400px; word-wrap: break-word; padding: 10px; font-family: inherit; font-size: inherit;">{srt_content}</pre>"""
+    html_nr_txt = f"""<pre style="white-space: pre-wrap; overflow-y:auto; height: 400px; word-wrap: break-word; padding: 10px; font-family: inherit; font-size: inherit;">{txt_nr_content}</pre>"""
+    html_r_txt = f"""<pre style="white-space: pre-wrap; overflow-y:auto; height: 400px; word-wrap: break-word; padding: 10px; font-family: inherit; font-size: inherit;">{txt_r_content}</pre>"""
+
+    filename_copy = input_file_name
+    srt_dummy_output_path = srt_output_path
+
+    return srt_content, txt_nr_content, txt_r_content, main_files, doc_files ,html_srt, html_nr_txt, html_r_txt, filename_copy, srt_dummy_output_path, df_display
+
+def transcribe(File, Model, Computing, Lang, BeamSize, VadFilter, Device="auto", CpuThreads=0, NumWorkers=1, Parallel=False, ParallelWorkers=0, Outputs=None, progress=gr.Progress()):
     if not File:
         error_message = "エラー: ファイルが提供されていません。"
-        return error_message, "", "", [], [], "", "", "", "", ""
+        yield error_message, "", "", [], [], "", "", "", "", ""
+        return
 
     try:
-        FileName = File.name if hasattr(File, 'name') else File
         if Lang == "日本語":
             Lang = "ja"
         else:
             Lang = "en"
         
-        model = WhisperModel(Model, device="cuda", compute_type=Computing)
-        segments, _ = model.transcribe(File, word_timestamps=True, beam_size=BeamSize, initial_prompt="Hello, I am Scott.", language=Lang, vad_filter=VadFilter)
+        # auto/cpu/cudaからデバイスを決める。cpuの場合はint8になる。
+        device, compute_type, model_kwargs = model_registry.resolve_device(Device, Computing, CpuThreads, NumWorkers)
+        transcribe_start = time.perf_counter()
+        # 同じ音声・同じ条件で文字起こし済みなら、キャッシュから結果を読む
+        cache = transcript_cache.get_cache()
+        cache_key = cache.make_key(File, Model, compute_type, Lang, BeamSize, VadFilter)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            words_data, total_duration = cached
+            print(f"Transcript cache hit: {cache.stats()}")
+        elif Parallel:
+            # 長い音声は無音区間で分割し、ワーカープロセスで並列に処理する
+            progress(0)
+            words_data, total_duration = parallel_transcribe.transcribe_parallel(
+                File, Model, device, compute_type, Lang, BeamSize, VadFilter,
+                workers=ParallelWorkers, progress=progress)
+        else:
+            # 同じ(モデル, device, compute_type)ならロード済みのモデルを使い回す
+            model = model_registry.get_model(Model, device=device, compute_type=compute_type, **model_kwargs)
+            # 前回の途中経過があれば、そこから先の音声だけを文字起こしする
+            resumed = checkpoint.load(cache_key)
+            if resumed is not None:
+                words_data, resume_offset = resumed
+                source = checkpoint.audio_from(File, resume_offset)
+                print(f"Resuming from checkpoint at {resume_offset:.1f}s ({len(words_data)} words)")
+            else:
+                words_data, resume_offset = WordTable(), 0.0
+                # 16kHzにデコード済みの配列を使う（2回目以降はffmpegを通さない）
+                source = audio_cache.load_audio(File)
+            options = dict(word_timestamps=True, beam_size=BeamSize, initial_prompt="Hello, I am Scott.", language=Lang)
+            if resumed is None:
+                segments, info = transcribe_audio(model, File, source, VadFilter, **options)
+            else:
+                segments, info = model.transcribe(source, vad_filter=VadFilter, **options)
     except Exception as e:
         error_message = f"文字起こし中にエラーが発生しました: {e}"
-        return error_message, "", "", [], [], "", "", "", "", ""
+        yield error_message, "", "", [], [], "", "", "", "", ""
+        return
 
-    total_duration = get_audio_duration(File)
-    if isinstance(total_duration, str):  # get_audio_duration関数がエラーメッセージを返した場合
-        return total_duration, "", "", [], [], "", "", "", "", ""
-    words_data = []
+    if cached is None and not Parallel:
+        # faster_whisperが返す長さを優先し、無い時だけファイルを調べる
+        if info.duration:
+            total_duration = resume_offset + info.duration
+        else:
+            total_duration = get_audio_duration(File)
+        if isinstance(total_duration, str):  # get_audio_duration関数がエラーメッセージを返した場合
+            yield total_duration, "", "", [], [], "", "", "", "", ""
+            return
 
     try:
-        # Initialize tqdm progress bar
-        progress_bar = tqdm(total=total_duration, unit="s", position=0, leave=True, desc="処理進行状況")
-        last_update_time = 0
-
-        # 初期更新
-        progress(0)
-        progress_bar.update(0)
-
-        for segment in segments:
-            for word in segment.words:
-                word_info = {
-                    "start": word.start,
-                    "end": word.end,
-                    "word": word.word
-                }
-                words_data.append(word_info)
-            
-            # Update progress at a reasonable frequency
-            segment_progress = segment.end - last_update_time
-            if segment_progress >= 1.0:  # Update every 1 second
-                progress_bar.update(segment_progress)
-                progress(segment.end / total_duration)
-                last_update_time = segment.end        
-                progress_bar.set_postfix({"progress": segment.end / total_duration * 100})
-
-        progress_bar.update(total_duration - last_update_time)
-        progress(1.0)  # Ensure progress is 100% at the end
-        # Close tqdm progress bar
-        progress_bar.close()
+        if cached is None:
+            if not Parallel:
+                # 文が閉じるたびに途中経過を表示する（1秒に1回まで）
+                builder = TranscriptBuilder()
+                for start, end, word in words_data:
+                    builder.add_word(start, end, word)
+                checkpointer = checkpoint.Checkpointer(cache_key)
+                last_yield_time = time.perf_counter()
+                for segment_end, segment_words in stream_words(segments, total_duration - resume_offset, progress, resume_offset):
+                    words_data.extend(segment_words)
+                    checkpointer.maybe_save(words_data, segment_end)
+                    closed = False
+                    for start, end, word in segment_words:
+                        closed = builder.add_word(start, end, word) or closed
+                    if closed and time.perf_counter() - last_yield_time >= 1.0:
+                        last_yield_time = time.perf_counter()
+                        yield (builder.srt_text(), builder.nr_text(), builder.r_text()) + (gr.update(),) * 8
+            cache.put(cache_key, words_data, total_duration)
+            if not Parallel:
+                checkpointer.finish()
+
+        # 処理速度の記録（CPUの場合はコアあたりの速度も出す）
+        elapsed = time.perf_counter() - transcribe_start
+        speed = total_duration / elapsed if elapsed > 0 else 0
+        print(f"Transcribed {total_duration:.1f}s of audio in {elapsed:.1f}s on {device} ({compute_type}), x{speed:.2f} realtime")
+        if device == "cpu":
+            print(f"Throughput per core: x{speed / model_kwargs['cpu_threads']:.3f} realtime")
+        print(f"Model registry: {model_registry.registry_stats()}")
+        print(f"VAD cache: {vad_cache.vad_stats()}")
     except Exception as e:
         error_message = f"進捗バー更新中にエラーが発生しました: {e}"
-        return error_message, "", "", [], [], "", "", "", "", ""
-    finally:
-        # メモリ解放
-        del model
+        yield error_message, "", "", [], [], "", "", "", "", ""
+        return
 
     try:
-        for word_info in words_data:
-            word_info["word"] = word_info["word"].replace(" Dr.", " Dr★").replace(" dr.", " dr★")
-
-        # 前処理: words_data内の各wordの中から★を削除する
-        cleaned_words_data = []
-        for word_info in words_data:
-            cleaned_word_info = {
-                "start": word_info["start"],
-                "end": word_info["end"],
-                "word": word_info["word"].replace("★", "")
-            }
-            cleaned_words_data.append(cleaned_word_info)
-
-        input_file_name = os.path.splitext(os.path.basename(File))[0]
-        temp_dir = tempfile.gettempdir()
-        
-        json_output_file_name = f"{input_file_name}.json"
-        json_output_path = os.path.join(temp_dir, json_output_file_name)
-        # JSONファイルへの書き込み
-        with open(json_output_path, 'w', encoding='utf-8') as f:
-           json.dump(cleaned_words_data, f, ensure_ascii=False, indent=4)
-           
-        # 書き込んだJSONデータの表示（デバッグ用）
-        json_content = json.dumps(cleaned_words_data, ensure_ascii=False, indent=4)
-
-        srt_entries = []
-        entry_number = 1
-        segment_text = ""
-        segment_start = None
-        segment_end = None
-
-        for word_info in words_data:
-            if segment_start is None:
-                segment_start = word_info["start"]
-            
-            segment_text += word_info["word"]
-            segment_end = word_info["end"]
-            
-            if word_info["word"].endswith('.'):
-                srt_entries.append({
-                    "number": entry_number,
-                    "start": segment_start,
-                    "end": segment_end,
-                    "text": segment_text.strip()
-                })
-                entry_number += 1
-                segment_text = ""
-                segment_start = None
-
-        if segment_text.strip():
-            srt_entries.append({
-                "number": entry_number,
-                "start": segment_start,
-                "end": segment_end,
-                "text": segment_text.strip()
-            })
-
-        srt_output_file_name = f"{input_file_name}.srt"
-        srt_output_path = os.path.join(temp_dir, srt_output_file_name)
-
-        with open(srt_output_path, 'w', encoding='utf-8') as f:
-            for entry in srt_entries:
-                start_time = format_timestamp(entry["start"])
-                end_time = format_timestamp(entry["end"])
-                text = entry['text'].replace(" Dr★", " Dr.").replace(" dr★", " dr.").replace("Dr★", "Dr.")
-                f.write(f"{entry['number']}\n{start_time} --> {end_time}\n{text}\n\n")
-
-        with open(srt_output_path, 'r', encoding='utf-8') as f:
-            srt_content = f.read()
-
-        txt_nr_content = ""
-        for word_info in words_data:
-            if not txt_nr_content:
-                txt_nr_content += word_info['word'].lstrip()
-            else:
-                txt_nr_content += word_info['word']
-
-        txt_nr_output_file_name = f"{input_file_name}_NR.txt"
-        txt_nr_output_path = os.path.join(temp_dir, txt_nr_output_file_name)
-        with open(txt_nr_output_path, 'w', encoding='utf-8') as f:
-            txt_nr_content = txt_nr_content.replace(" Dr★", " Dr.").replace(" dr★", " dr.").replace("Dr★", "Dr.")
-            f.write(txt_nr_content)
-
-        txt_r_content = ""
-        previous_word_end = 0
-        is_first_word = True
-        for word in words_data:
-            if is_first_word or txt_r_content.endswith("\n"):
-                txt_r_content += word['word'].strip()
-            else:
-                txt_r_content += word['word']
-        
-            if "." in word['word']:
-                if word['start'] - previous_word_end >= 0.5:
-                    txt_r_content += "\n"
-                previous_word_end = word['end']
-            is_first_word = False
-
-        txt_r_output_file_name = f"{input_file_name}_R.txt"
-        txt_r_output_path = os.path.join(temp_dir, txt_r_output_file_name)
-
-        with open(txt_r_output_path, 'w', encoding='utf-8') as f:
-            txt_r_content = txt_r_content.replace(" Dr★", " Dr.").replace(" dr★", " dr.").replace("Dr★", "Dr.")
-            f.write(txt_r_content)
-
-        # srtファイルからワードファイルへ変換
-        doc_srt = Document()
-
-        srtdoc_output_file_name = f"{input_file_name}_srt.docx"
-        srtdoc_output_path = os.path.join(temp_dir, srtdoc_output_file_name)
-
-        with open(srt_output_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        subtitle_number = None
-        timestamp = None
-        subtitle_text = []
-
-        for line in lines:
-            line = line.strip()
-            if line.isdigit():
-                # 以前の字幕エントリを追加
-                if subtitle_number is not None and subtitle_text:
-                    doc_srt.add_paragraph(f'{subtitle_number}')
-                    doc_srt.add_paragraph(f'{timestamp}')
-                    doc_srt.add_paragraph(' '.join(subtitle_text))
-                    doc_srt.add_paragraph()  # 空行で区切る
-
-                subtitle_number = line
-                timestamp = None
-                subtitle_text = []
-            elif '-->' in line:
-                timestamp = line
-            elif line:
-                subtitle_text.append(line)
-
-        if subtitle_number is not None and subtitle_text:
-            doc_srt.add_paragraph(f'{subtitle_number}')
-            doc_srt.add_paragraph(f'{timestamp}')
-            doc_srt.add_paragraph(' '.join(subtitle_text))
-
-        doc_srt.save(srtdoc_output_path)
-
-        ## txt(nr)をdoc変換
-        txtdoc_nr = Document()
-        txtdoc_nr_output_file_name = f"{input_file_name}_txtnr.docx"
-        txtdoc_nr_output_path = os.path.join(temp_dir, txtdoc_nr_output_file_name)
-
-        with open(txt_nr_output_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        for line in lines:
-            txtdoc_nr.add_paragraph(line)
-
-        txtdoc_nr.save(txtdoc_nr_output_path)
-
-        ## txt(r)をdoc変換
-        txtdoc_r = Document()
-        txtdoc_r_output_file_name = f"{input_file_name}_txtr.docx"
-        txtdoc_r_output_path = os.path.join(temp_dir, txtdoc_r_output_file_name)
-
-        with open(txt_r_output_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        for line in lines:
-            txtdoc_r.add_paragraph(line)
-
-        txtdoc_r.save(txtdoc_r_output_path)
-
-        #xls,df追加
-
-        excel_filepath, df_display = create_excel_from_srt_c(srt_content=srt_content, input_file_name=input_file_name)
-
-        # zipファイルにまとめる(srt,txtr,txtnr)。
-        zip_core_file_name = f"{input_file_name}_core.zip"
-        zip_core_file_path = os.path.join(temp_dir, zip_core_file_name)
-
-        with zipfile.ZipFile(zip_core_file_path, 'w') as zip_file:
-            zip_file.write(srt_output_path, os.path.basename(srt_output_path))
-            zip_file.write(txt_r_output_path, os.path.basename(txt_r_output_path))
-            zip_file.write(txt_nr_output_path, os.path.basename(txt_nr_output_path))
-            zip_file.write(excel_filepath, os.path.basename(excel_filepath))
-     
-        # zipファイルにまとめる(doc)。
-        zip_doc_file_name = f"{input_file_name}_docx_en.zip"
-        zip_doc_file_path = os.path.join(temp_dir, zip_doc_file_name)
-
-        with zipfile.ZipFile(zip_doc_file_path, 'w') as zip_file:
-            zip_file.write(srtdoc_output_path, os.path.basename(srtdoc_output_path))
-            zip_file.write(txtdoc_nr_output_path, os.path.basename(txtdoc_nr_output_path))
-            zip_file.write(txtdoc_r_output_path, os.path.basename(txtdoc_r_output_path))
-
-        print(f"Processed {FileName}")
-        
-        main_files = [
-            srt_output_path,
-            txt_nr_output_path,
-            txt_r_output_path,
-            excel_filepath,
-            zip_core_file_path
-        ]
-        
-        zip_doc_file_path = os.path.join(temp_dir, zip_doc_file_name)
-
-        doc_files = [srtdoc_output_path, txtdoc_nr_output_path, txtdoc_r_output_path, zip_doc_file_path]
-        
-        df_display = df_display
-        html_srt = f"""<pre style="white-space: pre-wrap; overflow-y: auto; height: 400px; word-wrap: break-word; padding: 10px; font-family: inherit; font-size: inherit;">{srt_content}</pre>"""
-        html_nr_txt = f"""<pre style="white-space: pre-wrap; overflow-y:auto; height: 400px; word-wrap: break-word; padding: 10px; font-family: inherit; font-size: inherit;">{txt_nr_content}</pre>"""
-        html_r_txt = f"""<pre style="white-space: pre-wrap; overflow-y:auto; height: 400px; word-wrap: break-word; padding: 10px; font-family: inherit; font-size: inherit;">{txt_r_content}</pre>"""
-
-        filename_copy = input_file_name
-        srt_dummy_output_path = srt_output_path
-
-        return srt_content, txt_nr_content, txt_r_content, main_files, doc_files ,html_srt, html_nr_txt, html_r_txt, filename_copy, srt_dummy_output_path, df_display
+        yield create_output_files(words_data, File, Outputs)
     except Exception as e:
         error_message = f"ファイル処理中にエラーが発生しました: {e}"
-        return error_message, "", "", [], [], "", "", "", "", "", ""
+        yield error_message, "", "", [], [], "", "", "", "", "", ""
+
+# 1つのファイルを文字起こしして出力ファイルを作る（画面を使わない処理用）。
+# 文字起こし結果のキャッシュがあれば使う。(create_output_filesの戻り値, 音声の長さ)を返す。
+def transcribe_to_files(File, model, Model, compute_type, Lang, BeamSize, VadFilter, Outputs=None, output_dir=None):
+    cache = transcript_cache.get_cache()
+    cache_key = cache.make_key(File, Model, compute_type, Lang, BeamSize, VadFilter)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        words_data, duration = cached
+    else:
+        audio = audio_cache.load_audio(File)
+        segments, info = transcribe_audio(model, File, audio, VadFilter, word_timestamps=True, beam_size=BeamSize, initial_prompt="Hello, I am Scott.", language=Lang)
+        duration = info.duration
+        words_data = collect_words(segments, duration, lambda value: None)
+        cache.put(cache_key, words_data, duration)
+    return create_output_files(words_data, File, Outputs, output_dir), duration
+
+# 一括処理でファイルごとの出力先（root/ファイル名）を作る。
+# 別のフォルダにある同じ名前のファイルが上書きし合わないよう、重複する名前には _2, _3 を付ける。
+def batch_output_dirs(Files, root):
+    dirs = []
+    used = set()
+    for File in Files:
+        stem = os.path.splitext(os.path.basename(File))[0]
+        name = stem
+        number = 2
+        while name.lower() in used:
+            name = f"{stem}_{number}"
+            number += 1
+        used.add(name.lower())
+        path = os.path.join(root, name)
+        os.makedirs(path, exist_ok=True)
+        dirs.append(path)
+    return dirs
+
+# 複数ファイルの一括処理。モデルは1回だけロードし、全ファイルで使い回す。
+def transcribe_batch(Files, Model, Computing, Lang, BeamSize, VadFilter, Device="auto", CpuThreads=0, NumWorkers=1, Outputs=None, progress=gr.Progress()):
+    if not Files:
+        return [], "エラー: ファイルが提供されていません。"
+
+    Lang = "ja" if Lang == "日本語" else "en"
+    device, compute_type, model_kwargs = model_registry.resolve_device(Device, Computing, CpuThreads, NumWorkers)
+    try:
+        model = model_registry.get_model(Model, device=device, compute_type=compute_type, **model_kwargs)
+    except Exception as e:
+        return [], f"モデルの読み込み中にエラーが発生しました: {e}"
+
+    batch_start = time.perf_counter()
+    total_audio = 0.0
+    manifest = []
+    output_files = []
+    # 一括処理の出力は1つのジョブディレクトリの中に、ファイルごとに分けて置く
+    job_dir = artifact_store.new_job("batch")
+    output_dirs = batch_output_dirs(Files, job_dir)
+
+    for File, output_dir in zip(progress.tqdm(Files, desc="一括処理"), output_dirs):
+        file_start = time.perf_counter()
+        entry = {"file": os.path.basename(File)}
+        try:
+            result, duration = transcribe_to_files(File, model, Model, compute_type, Lang, BeamSize, VadFilter, Outputs, output_dir)
+            main_files, doc_files = result[3], result[4]
+            entry.update({
+                "status": "ok",
+                "duration": round(duration, 3),
+                "outputs": [os.path.relpath(path, job_dir) for path in main_files + doc_files],
+            })
+            total_audio += duration
+            output_files.extend(main_files + doc_files)
+        except Exception as e:
+            entry.update({"status": "error", "error": str(e)})
+        entry["seconds"] = round(time.perf_counter() - file_start, 3)
+        manifest.append(entry)
+
+    summary = batch_summary(manifest, time.perf_counter() - batch_start, total_audio, Model, device, compute_type)
+
+    manifest_path = os.path.join(job_dir, "batch_manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=4)
+    output_files.insert(0, manifest_path)
+
+    message = (f"{summary['succeeded']}/{summary['files']} ファイル完了　"
+               f"{summary['files_per_minute']} files/min　RTF {summary['real_time_factor']}")
+    print(message)
+    return output_files, message
+
+# 一括処理の結果(manifest)から処理速度と失敗数をまとめる
+def batch_summary(manifest, elapsed, total_audio, Model, device, compute_type):
+    succeeded = sum(1 for entry in manifest if entry["status"] == "ok")
+    return {
+        "model": Model,
+        "device": device,
+        "compute_type": compute_type,
+        "files": len(manifest),
+        "succeeded": succeeded,
+        "failed": len(manifest) - succeeded,
+        "elapsed_seconds": round(elapsed, 3),
+        "audio_seconds": round(total_audio, 3),
+        "files_per_minute": round(len(manifest) / elapsed * 60, 2) if elapsed > 0 else 0,
+        "real_time_factor": round(elapsed / total_audio, 4) if total_audio > 0 else 0,
+        "transcript_cache": transcript_cache.get_cache().stats(),
+        "items": manifest,
+    }
@@ -0,0 +1,75 @@
+import os
+import json
+import threading
+from tab1 import cache_utils
+from tab1.word_table import WordTable
+
+# 文字起こし結果(words_data)のディスクキャッシュ。
+# キーは音声のハッシュ + モデル, compute_type, 言語, ビームサイズ, VAD。
+
+DEFAULT_MAX_MB = int(os.environ.get("MOZOCOS_TRANSCRIPT_CACHE_MB", "500"))
+
+
+class TranscriptCache:
+    def __init__(self, directory=None, max_mb=DEFAULT_MAX_MB):
+        self.directory = directory or cache_utils.cache_dir("transcripts")
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, file_path, model_name, compute_type, lang, beam_size, vad_filter):
+        digest = cache_utils.file_digest(file_path)
+        return cache_utils.params_key(digest, model_name, compute_type, lang, beam_size, bool(vad_filter))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        cache_utils.touch(path)
+        with self._lock:
+            self.hits += 1
+        if "words" in data:
+            # 以前の形式(dictのリスト)
+            return WordTable.from_records(data["words"]), data["duration"]
+        return WordTable.from_columns(data["columns"]), data["duration"]
+
+    def put(self, key, words_data, duration):
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"duration": duration, "columns": words_data.to_columns()}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        evicted = cache_utils.evict_lru(self.directory, self.max_bytes)
+        with self._lock:
+            self.evictions += evicted
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size_mb": round(cache_utils.directory_size(self.directory) / (1024 * 1024), 2),
+            }
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TranscriptCache()
+    return _cache
@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import threading
+from faster_whisper.vad import get_speech_timestamps, collect_chunks, VadOptions
+from faster_whisper.transcribe import restore_speech_timestamps
+from tab1 import cache_utils
+
+# Silero VADで求めた発話区間を音声のハッシュごとに保存し、再実行時に使い回す。
+# 発話区間はtranscribe_speechで文字起こしに使うほか、並列処理の分割にも使う。
+
+SAMPLING_RATE = 16000
+
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "vad_seconds": 0.0, "saved_seconds": 0.0}
+
+
+def _path(file_path, vad_options):
+    key = cache_utils.params_key(cache_utils.file_digest(file_path), sorted(vad_options._asdict().items()))
+    return os.path.join(cache_utils.cache_dir("vad"), f"{key}.json")
+
+
+def get_speech_timestamps_cached(file_path, audio, vad_options=None):
+    # 発話区間(サンプル単位のstart/end)のリストを返す
+    vad_options = vad_options or VadOptions()
+    path = _path(file_path, vad_options)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with _lock:
+            stats["hits"] += 1
+            stats["saved_seconds"] += data["seconds"]
+        cache_utils.touch(path)
+        return data["speech"]
+    except (OSError, ValueError):
+        pass
+
+    start = time.perf_counter()
+    speech = get_speech_timestamps(audio, vad_options)
+    elapsed = time.perf_counter() - start
+    with _lock:
+        stats["misses"] += 1
+        stats["vad_seconds"] += elapsed
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"seconds": elapsed, "speech": speech}, f)
+    os.replace(tmp_path, path)
+    return speech
+
+
+def transcribe_speech(model, audio, speech, **kwargs):
+    # faster_whisperのvad_filter=Trueと同じく、発話区間をつないだ音声を文字起こしして時刻を元の時間軸に戻す。
+    # 違うのはVADを計算せず、渡された発話区間を使うことだけ。
+    segments, info = model.transcribe(collect_chunks(audio, speech), vad_filter=False, **kwargs)
+    info = info._replace(duration=len(audio) / SAMPLING_RATE, duration_after_vad=info.duration)
+    return restore_speech_timestamps(segments, speech, SAMPLING_RATE), info
+
+
+def vad_stats():
+    with _lock:
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
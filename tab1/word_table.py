@@ -0,0 +1,78 @@
+from array import array
+import numpy as np
+
+# 単語のタイムスタンプを列ごとにまとめて持つ表。
+# 単語ごとにdictを作らず、開始/終了時刻はミリ秒の整数配列、単語の文字列は1本のバッファ+オフセットで持つ。
+# faster_whisperの時刻は小数2桁に丸められているので、ミリ秒の整数にしても値は変わらない。
+
+
+class WordTable:
+    __slots__ = ("_starts", "_ends", "_offsets", "_pieces", "_text")
+
+    def __init__(self):
+        self._starts = array('i')
+        self._ends = array('i')
+        self._offsets = array('I', [0])
+        self._pieces = []
+        self._text = ""
+
+    def append(self, start, end, word):
+        self._starts.append(round(start * 1000))
+        self._ends.append(round(end * 1000))
+        self._offsets.append(self._offsets[-1] + len(word))
+        self._pieces.append(word)
+
+    def extend(self, words):
+        for start, end, word in words:
+            self.append(start, end, word)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def text(self):
+        # 追加された単語は必要になった時に1本の文字列にまとめる
+        if self._pieces:
+            self._text = self._text + "".join(self._pieces)
+            self._pieces = []
+        return self._text
+
+    def word(self, index):
+        return self.text()[self._offsets[index]:self._offsets[index + 1]]
+
+    def __iter__(self):
+        text = self.text()
+        offsets = self._offsets
+        for index, (start, end) in enumerate(zip(self._starts, self._ends)):
+            yield start / 1000, end / 1000, text[offsets[index]:offsets[index + 1]]
+
+    def numpy_columns(self):
+        # コピーせずにnumpy配列として見る（ミリ秒）。配列を参照している間はappendできないので、表が完成してから使う。
+        return np.frombuffer(self._starts, dtype=np.int32), np.frombuffer(self._ends, dtype=np.int32)
+
+    def records(self, transform=None):
+        for start, end, word in self:
+            yield {"start": start, "end": end, "word": transform(word) if transform else word}
+
+    def to_columns(self):
+        return {
+            "starts": self._starts.tolist(),
+            "ends": self._ends.tolist(),
+            "offsets": self._offsets.tolist(),
+            "text": self.text(),
+        }
+
+    @classmethod
+    def from_columns(cls, columns):
+        table = cls()
+        table._starts = array('i', columns["starts"])
+        table._ends = array('i', columns["ends"])
+        table._offsets = array('I', columns["offsets"])
+        table._text = columns["text"]
+        return table
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        for record in records:
+            table.append(record["start"], record["end"], record["word"])
+        return table
@@ -1,35 +1,21 @@
 import os
-import tempfile
 import json
 from pydub import AudioSegment
 import gradio as gr
 from faster_whisper import WhisperModel
-import zipfile
 from docx import Document
 import re
-from openpyxl.styles import Alignment, Font, PatternFill
 import pandas as pd
+from common import artifact_store
+from common import excel_export
+from common import zip_packager
+from common import subtitles
 
 #tab2の関数
 def parse_srt(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        content = file.read()
-    
-    pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)\n\n'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    subtitles = []
-    for match in matches:
-        subtitles.append({
-            'ID': int(match[0]),
-            'Start': match[1],
-            'End': match[2],
-            'Text': match[3].replace('\n', ' ')
-        })
-    
-    return subtitles
+    return subtitles.to_records(subtitles.parse_file(file_path), 'srt')
 
-def create_excel_from_srt(srt_file_path, japanese_srt_path,basename):
+def create_excel_from_srt(srt_file_path, japanese_srt_path,basename, output_dir=None):
     english_subtitles = parse_srt(srt_file_path)
     japanese_subtitles = parse_srt(japanese_srt_path)
     if english_subtitles is None or japanese_subtitles is None:
@@ -49,34 +35,9 @@ def create_excel_from_srt(srt_file_path, japanese_srt_path,basename):
         #base_name = os.path.splitext(os.path.basename(srt_file_path))[0]
         base_name=basename
         excel_file_name = f"{base_name}.xlsx"
-        excel_file_path = os.path.join(tempfile.gettempdir(), excel_file_name)
+        excel_file_path = os.path.join(output_dir or artifact_store.new_job("tab2"), excel_file_name)
         
-        with pd.ExcelWriter(excel_file_path, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Subtitles')
-            workbook = writer.book
-            worksheet = writer.sheets['Subtitles']
-
-            column_widths = {'A': 7, 'B': 25, 'C': 25, 'D': 90, 'E': 90}
-            for column, width in column_widths.items():
-                worksheet.column_dimensions[column].width = width
-
-            for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-                for cell in row:
-                    if cell.column_letter == 'A':
-                        cell.alignment = Alignment(horizontal='right', vertical='center')
-                    elif cell.column_letter in ['B', 'C']:
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                    elif cell.column_letter in ['D', 'E']:
-                        cell.alignment = Alignment(horizontal='left', vertical='center')
-
-            for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-                worksheet.row_dimensions[row[0].row].height = 30
-
-            header_font = Font(bold=True)
-            for cell in worksheet["1:1"]:
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-                cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+        excel_export.write_dataframe(df, excel_file_path)
 
         return excel_file_path, df
 
@@ -92,9 +53,22 @@ def count_lines_in_file(file_path):
         print(f"Error counting lines in file '{file_path}': {str(e)}")
         return 0
 
+# 2つ以上のファイルがあれば{copied_filename}_ja.zipにまとめてoutput_filesに加える。
+# contentsにある内容（書き出したテキスト）はファイルを読み直さずにそのまま使う。
+def package_files(output_files, contents, copied_filename, temp_dir):
+    if len(output_files)>1:
+        zip_ja_file_path = os.path.join(temp_dir, f"{copied_filename}_ja.zip")
+        zip_packager.write_zip(zip_ja_file_path, zip_packager.members_from(output_files, contents))
+        output_files.append(zip_ja_file_path)
+
 def create_translate_files(copied_filename, translate_srt, translate_nr_txt, translate_r_txt, extensions, srt_file_path):
-    temp_dir = tempfile.gettempdir()
+    # Tab1のジョブの英語字幕を後で読むので、新しいジョブを作る前に使用中にしておく
+    if srt_file_path:
+        artifact_store.touch(srt_file_path)
+    # このジョブ専用のディレクトリに書き出す（同じファイル名の同時処理で上書きしない）
+    temp_dir = artifact_store.new_job("tab2")
     output_files = []
+    contents = {}
     df_data = pd.DataFrame({'1': [''], '2': [''], '3': ['']})
 
     # エラーチェック
@@ -142,6 +116,7 @@ def create_translate_files(copied_filename, translate_srt, translate_nr_txt, tra
                 f.write(final_content)
 
             output_files.append(output_file_path)
+            contents[output_file_path] = final_content
             continue
 
         # ここまで
@@ -150,6 +125,7 @@ def create_translate_files(copied_filename, translate_srt, translate_nr_txt, tra
             f.write(subtitle_content)
         
         output_files.append(output_file_path)
+        contents[output_file_path] = subtitle_content
     
     
     
@@ -166,43 +142,22 @@ def create_translate_files(copied_filename, translate_srt, translate_nr_txt, tra
             if num_lines_english == 0 or num_lines_japanese == 0:
                 print("Error: One or both of the SRT files are empty or cannot be read.")
                 # zipファイルにまとめる。
-                if len(output_files)>1:
-                    zip_ja_file_name = f"{copied_filename}_ja.zip"
-                    zip_ja_file_path = os.path.join(temp_dir, zip_ja_file_name)
-
-                    with zipfile.ZipFile(zip_ja_file_path, 'w') as zip_file:
-                        for file in output_files:
-                            zip_file.write(file, os.path.basename(file))
-                    output_files.append(zip_ja_file_path)        
+                package_files(output_files, contents, copied_filename, temp_dir)
                 return output_files, df_data
 
             if abs(num_lines_english - num_lines_japanese) > 3:
                 print("Error: Number of lines in English and Japanese SRT files do not match.")
                 # zipファイルにまとめる。
-                if len(output_files)>1:
-                    zip_ja_file_name = f"{copied_filename}_ja.zip"
-                    zip_ja_file_path = os.path.join(temp_dir, zip_ja_file_name)
-
-                    with zipfile.ZipFile(zip_ja_file_path, 'w') as zip_file:
-                        for file in output_files:
-                            zip_file.write(file, os.path.basename(file))
-                    output_files.append(zip_ja_file_path)        
+                package_files(output_files, contents, copied_filename, temp_dir)
                 return output_files, df_data
 
-            excel_path, df_data = create_excel_from_srt(srt_file_path, srt_output_path,copied_filename)
+            excel_path, df_data = create_excel_from_srt(srt_file_path, srt_output_path,copied_filename, temp_dir)
             print(f"Excel path: {excel_path}, DataFrame: {df_data.head()}")
             if excel_path:
                 output_files.append(excel_path)
 
     # zipファイルにまとめる。
-    if len(output_files)>1:
-        zip_ja_file_name = f"{copied_filename}_ja.zip"
-        zip_ja_file_path = os.path.join(temp_dir, zip_ja_file_name)
-
-        with zipfile.ZipFile(zip_ja_file_path, 'w') as zip_file:
-            for file in output_files:
-                zip_file.write(file, os.path.basename(file))
-        output_files.append(zip_ja_file_path)        
+    package_files(output_files, contents, copied_filename, temp_dir)
         
     return output_files, df_data
 
@@ -2,69 +2,16 @@
 import gradio as gr
 import pandas as pd
 import os
-import tempfile
-import re
-from openpyxl.styles import Alignment, Font, PatternFill
-from tab7 import tab7_func as t7
-from tab4 import tab4_func as t4
+from common import artifact_store
+from common import excel_export
+from common import subtitles
 
 # SRTファイルを解析する関数
 def parse_srt(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
-    
-    # タイムスタンプの整形を適用
-    lines = t4.unify_timestamps_forlist(lines, 'srt')
-    
-    # 再度文字列として結合
-    content = ''.join(lines).replace('\u200B', '')
-    pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\d|\Z)', re.DOTALL)
-    matches = pattern.findall(content)
-    print(f"parse_srt_len(matches):{len(matches)}")
-
-
-    subtitles = []
-    for match in matches:
-        subtitles.append({
-            'ID': int(match[0]),
-            'Start': match[1],
-            'End': match[2],
-            'Text': match[3].replace('\n', ' ')
-        })
-    
-    return subtitles
+    return subtitles.to_records(subtitles.parse_file(file_path), 'srt')
 
 def parse_vtt(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
-
-    # タイムスタンプの整形を適用
-    lines = t4.unify_timestamps_forlist(lines, 'vtt')
-
-    # 再度文字列として結合
-    content = ''.join(lines).replace('\u200B', '')
-    content = t7.webvtt_remover(content)
-    print(f"after_webvtt_remover: {content}")
-    
-    pattern = re.compile(r'(\d+)\n(\d{1}:\d{2}:\d{2}\.\d{3}) --> (\d{1}:\d{2}:\d{2}\.\d{3})\n(.*?)(?=\n\d|\Z)', re.DOTALL)
-    matches = pattern.findall(content)
-    print(f"parse_vtt_d1:Len(matches): {len(matches)}")
-    
-    if len(matches) == 0:
-        pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2}\.\d{3}) --> (\d{2}:\d{2}:\d{2}\.\d{3})\n(.*?)(?=\n\d|\Z)', re.DOTALL)
-        matches = pattern.findall(content)
-        print(f"parse_vtt_d2:Len(matches): {len(matches)}")
-        
-    subtitles = []
-    for match in matches:
-        subtitles.append({
-            'ID': int(match[0]),
-            'Start': match[1],
-            'End': match[2],
-            'Text': match[3].replace('\n', ' ')
-        })
-    
-    return subtitles
+    return subtitles.to_records(subtitles.parse_file(file_path), 'vtt')
 
 # SRTファイルからExcelファイルを作成する関数
 def create_excel_from_srt(english_path=None, japanese_path=None):
@@ -146,34 +93,9 @@ def create_excel_from_srt(english_path=None, japanese_path=None):
     else:
         return None, None
 
-    excel_file_path = os.path.join(tempfile.gettempdir(), excel_file_name)
+    excel_file_path = os.path.join(artifact_store.new_job("tab3"), excel_file_name)
     
-    with pd.ExcelWriter(excel_file_path, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Subtitles')
-        workbook = writer.book
-        worksheet = writer.sheets['Subtitles']
-
-        column_widths = {'A': 7, 'B': 25, 'C': 25, 'D': 90, 'E': 90}
-        for column, width in column_widths.items():
-            worksheet.column_dimensions[column].width = width
-
-        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-            for cell in row:
-                if cell.column_letter == 'A':
-                    cell.alignment = Alignment(horizontal='right', vertical='center')
-                elif cell.column_letter in ['B', 'C']:
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                elif cell.column_letter in ['D', 'E']:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-
-        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-            worksheet.row_dimensions[row[0].row].height = 30
-
-        header_font = Font(bold=True)
-        for cell in worksheet["1:1"]:
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-            cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+    excel_export.write_dataframe(df, excel_file_path)
 
     return excel_file_path, df
 
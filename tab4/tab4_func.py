@@ -5,57 +5,31 @@ import codecs
 import re
 
 
-#vttファイルのタイムスタンプ桁数を統一。
-
+# タイムスタンプのミリ秒が1桁・2桁のものを3桁にそろえる（"00:00:01,5" → "00:00:01,500"）。
+# 形式ごとに1つの正規表現で全体を1回だけ走査する。そろっていれば何もせずにそのまま返す。
+_SHORT_MILLIS = {
+    'vtt': re.compile(r'\d:\d{2}:\d{2}\.(\d{1,2})(?!\d)'),  # H:MM:SS.m と HH:MM:SS.m
+    'srt': re.compile(r'\d{2}:\d{2}:\d{2},(\d{1,2})(?!\d)'),
+}
+# ミリ秒の桁数 → 補う0
+_MILLIS_PADDING = {1: '00', 2: '0'}
+
+def _pad_millis(match):
+    return match.group(0) + _MILLIS_PADDING[len(match.group(1))]
+
+def _unify(text, format_type):
+    pattern = _SHORT_MILLIS[format_type]
+    if pattern.search(text) is None:
+        return text
+    return pattern.sub(_pad_millis, text)
 
+#vttファイルのタイムスタンプ桁数を統一。
 def unify_timestamps_vtt(text):
-    # Define patterns for different timestamp formats
-    pattern_1_digit = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d)(?!\d)')
-    pattern_2_digits = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{2})(?!\d)')
-    pattern_3_digit = re.compile(r'(\d{1}:\d{2}:\d{2}\.\d)(?!\d)')
-    pattern_4_digits = re.compile(r'(\d{1}:\d{2}:\d{2}\.\d{2})(?!\d)')
-
-    # Replace 1-digit and 2-digit millisecond formats with 3-digit format for HH:MM:SS format
-    if pattern_1_digit.search(text):
-        text = pattern_1_digit.sub(lambda x: x.group(1) + '00', text)
-        print("pattern1")
-    if pattern_2_digits.search(text):
-        text = pattern_2_digits.sub(lambda x: x.group(1) + '0', text)
-        print("pattern2")
-
-    # Replace 1-digit and 2-digit millisecond formats with 3-digit format for H:MM:SS format
-    if pattern_3_digit.search(text):
-        text = pattern_3_digit.sub(lambda x: x.group(1) + '00', text)
-        print("pattern3")
-    if pattern_4_digits.search(text):
-        text = pattern_4_digits.sub(lambda x: x.group(1) + '0', text)
-        print("pattern4")
-
-    return text
-
+    return _unify(text, 'vtt')
 
 #srtファイルのタイムスタンプ桁数を統一。
 def unify_timestamps(text):
-    # Define patterns for different timestamp formats
-    pattern_1_digit = re.compile(r'(\d{2}:\d{2}:\d{2}\,\d)(?!\d)')
-    pattern_2_digits = re.compile(r'(\d{2}:\d{2}:\d{2}\,\d{2})(?!\d)')
-    
-    # Replace 1-digit millisecond format with 3-digit format
-    text = pattern_1_digit.sub(lambda x: x.group(1) + '00', text)
-    
-    # Replace 2-digit millisecond format with 3-digit format
-    text = pattern_2_digits.sub(lambda x: x.group(1) + '0', text)
-    
-    return text
-def unify_timestamps_forlist(lines, format_type):
-    if format_type == 'vtt':
-        unify_timestamps_func = unify_timestamps_vtt
-    elif format_type == 'srt':
-        unify_timestamps_func = unify_timestamps
-    else:
-        raise ValueError(f"Unsupported format type: {format_type}")
-
-    return [unify_timestamps_func(line) if '-->' in line else line for line in lines]
+    return _unify(text, 'srt')
 
 def read_file_content(file):
     if file is None:
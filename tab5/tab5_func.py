@@ -1,11 +1,11 @@
 import gradio as gr
 import docx
 from docx import Document
-import tempfile
 import os
 import re
-import zipfile
 from tab4 import tab4_func as t4
+from common import artifact_store
+from common import zip_packager
 
 
 def webvtt_remover_NR(sentence):
@@ -55,6 +55,8 @@ def convert_docx_to_srttxt(docx_files):
     output_files = []
     if docx_files is None:
         return []
+    job_dir = artifact_store.new_job("tab5")
+    contents = {}
     for docx_file in docx_files:
         try:
             filename = os.path.basename(docx_file)
@@ -127,7 +129,7 @@ def convert_docx_to_srttxt(docx_files):
             if output_filename.endswith('.srt'):
                 final_content = "\n\n".join("\n".join(block) for block in zip(*[iter(corrected_content)] * 3))
 
-            output_filepath = os.path.join(tempfile.gettempdir(), output_filename)
+            output_filepath = os.path.join(job_dir, output_filename)
             if output_filename.endswith('.txt'):
                 final_content = content
 
@@ -135,14 +137,13 @@ def convert_docx_to_srttxt(docx_files):
                 output_file.write(final_content)
             
             output_files.append(output_filepath)
+            contents[output_filepath] = final_content
         except Exception as e:
             print(f"An error occurred while processing {filename}: {str(e)}")
 
     if len(output_files) > 1:
-        zip_filename = os.path.join(tempfile.gettempdir(), "converted_from_docx_ja.zip")
-        with zipfile.ZipFile(zip_filename, 'w') as zipf:
-            for file in output_files:
-                zipf.write(file, os.path.basename(file))
+        zip_filename = os.path.join(job_dir, "converted_from_docx_ja.zip")
+        zip_packager.write_zip(zip_filename, zip_packager.members_from(output_files, contents))
         
         output_files.append(zip_filename)
     
@@ -157,6 +158,7 @@ def process_doc_files(files):
     output_files = []
     if files is None:
         return []
+    job_dir = artifact_store.new_job("tab5")
     for file in files:
         filename = os.path.basename(file)
         print(filename)
@@ -173,6 +175,7 @@ def process_doc_files(files):
             doc_filename = f"{basename}_txtnr.docx"
         elif ext == "_R.txt":
             doc_filename = f"{basename}_txtr.docx"
+        doc_filename = os.path.join(job_dir, doc_filename)
 
         if ext in ['.srt', '.vtt']:
             with open(file, 'r', encoding='utf-8') as f:
@@ -198,10 +201,8 @@ def process_doc_files(files):
             output_files.append(doc_filename)
     
     if len(output_files) > 1:
-        zip_filename = "converted_from_srttxt_en.zip"
-        with zipfile.ZipFile(zip_filename, 'w') as zipf:
-            for file in output_files:
-                zipf.write(file)
+        zip_filename = os.path.join(job_dir, "converted_from_srttxt_en.zip")
+        zip_packager.write_zip(zip_filename, output_files)
         output_files.append(zip_filename)
     
     return output_files
@@ -3,21 +3,18 @@ import os
 import gradio as gr
 import codecs
 from docx import Document
-import pandas as pd
-from openpyxl.styles import Alignment, Font, PatternFill
-from tab4 import tab4_func as t4
+from common import abbreviations
+from common import artifact_store
+from common import excel_export
+from common import subtitles
+from common import timestamps
 
+# Dr. や .com などのピリオドを保護・復元する（略語の表はtab1と共通）
 def replace_special_periods(text):
-    text = re.sub(r'\bDr\.', 'Dr<PERIOD>', text)
-    text = re.sub(r'\.com\b', '<DOTCOM>', text)
-    text = re.sub(r'\.org\b', '<DOTORG>', text)
-    return text
+    return abbreviations.protect(text)
 
 def restore_special_periods(text):
-    text = text.replace('Dr<PERIOD>', 'Dr.')
-    text = text.replace('<DOTCOM>', '.com')
-    text = text.replace('<DOTORG>', '.org')
-    return text
+    return abbreviations.restore(text)
 
 
 
@@ -58,118 +55,37 @@ def merge_segments(segments):
 
     return merged_segments
 
-def process_vtt(lines):
+# 字幕を文単位に分け直す（ピリオドで終わるまで次の字幕とつなげる）。時刻はミリ秒。
+def resegment(cues):
     segments = []
-    start_time = None
-    end_time = None
-    text = ""
-    header = lines[0]
-
-    # タイムスタンプの整形を適用
-    lines = t4.unify_timestamps_forlist(lines, 'vtt')
-
-    for line in lines[1:]:
-        if re.match(r'^\d+$', line.strip()):
-            if text:
-                text = replace_special_periods(text)
-                if start_time is not None and end_time is not None:
-                    segments.extend(split_segment(text.strip(), start_time, end_time))
-            text = ""
-        elif '-->' in line:
-            times = line.strip().split(' --> ')
-            start_time = convert_time_to_seconds(times[0])
-            end_time = convert_time_to_seconds(times[1])
-        else:
-            text += line.strip() + " "
-
-    if text:
-        text = replace_special_periods(text)
-        if start_time is not None and end_time is not None:
+    for _, start_time, end_time, text in cues:
+        if text:
+            text = replace_special_periods(text)
             segments.extend(split_segment(text.strip(), start_time, end_time))
 
-    merged_segments = merge_segments(segments)
-
-    output = [header]
-    segment_number = 1
-    for text, start, end in merged_segments:
-        text = restore_special_periods(text)
-        output.append(f"{segment_number}")
-        output.append(convert_seconds_to_time(start, 'vtt') + ' --> ' + convert_seconds_to_time(end, 'vtt'))
-        output.append(text)
-        segment_number += 1
-        output.append("")  # セグメント間の改行を保持
+    merged = subtitles.Cues()
+    for number, (text, start, end) in enumerate(merge_segments(segments), 1):
+        merged.append(number, int(start + 0.5), int(end + 0.5), restore_special_periods(text))
+    return merged
 
-    return '\n'.join(output)
+def process_vtt(lines):
+    header = lines[0]
+    return subtitles.to_vtt(resegment(subtitles.parse(lines)), header)
 
 def process_srt(lines):
-    segments = []
-    start_time = None
-    end_time = None
-    text = ""
-    segment_index = 0
-
-    # タイムスタンプの整形を適用
-    lines = t4.unify_timestamps_forlist(lines, 'srt')
-
-    for line in lines:
-        if re.match(r'^\d+$', line.strip()):
-            if text:
-                text = replace_special_periods(text)
-                segments.extend(split_segment(text.strip(), start_time, end_time))
-            segment_index = int(line.strip())
-            text = ""
-        elif '-->' in line:
-            times = line.strip().split(' --> ')
-            start_time = convert_time_to_seconds(times[0].replace(',', '.'))
-            end_time = convert_time_to_seconds(times[1].replace(',', '.'))
-        else:
-            text += line.strip() + " "
-
-    if text:
-        text = replace_special_periods(text)
-        segments.extend(split_segment(text.strip(), start_time, end_time))
-
-    merged_segments = merge_segments(segments)
-
-    output = []
-    segment_number = 0
-    for text, start, end in merged_segments:
-        text = restore_special_periods(text)
-        output.append(f"{segment_number + 1}\n{convert_seconds_to_time(start,'srt').replace('.', ',')} --> {convert_seconds_to_time(end,'srt').replace('.', ',')}\n{text}\n")
-        segment_number += 1
-
-    return '\n'.join(output)
+    return subtitles.to_srt(resegment(subtitles.parse(lines)))
 
 
 
+# 時刻の変換はcommon.timestamps（ミリ秒の整数）で行う
 def convert_time_to_seconds(time_str):
     try:
-        time_parts = time_str.split(':')
-        if len(time_parts) == 3:
-            h, m, s = time_parts
-        elif len(time_parts) == 2:
-            h = 0
-            m, s = time_parts
-        else:
-            raise ValueError(f"Unexpected time format: {time_str}")
-        
-        h = float(h)
-        m = float(m)
-        s = float(s.replace(',', '.'))
-        return h * 3600 + m * 60 + s
+        return timestamps.parse_time(time_str) / 1000
     except ValueError as e:
         raise ValueError(f"Error converting time: {time_str}, {e}")
 
-
-
 def convert_seconds_to_time(seconds, format_type='vtt'):
-    h = int(seconds // 3600)
-    m = int((seconds % 3600) // 60)
-    s = seconds % 60
-    if format_type == 'vtt':
-        return f"{h:01}:{m:02}:{s:06.3f}".replace(',', '.')
-    else:
-        return f"{h:02}:{m:02}:{s:06.3f}".replace('.', ',')
+    return timestamps.format_time(timestamps.seconds_to_ms(seconds), format_type)
     
 def process_file(input_file):
     if input_file is None:
@@ -178,14 +94,16 @@ def process_file(input_file):
     with open(input_file, 'r') as file:
         lines = file.readlines()
 
-    _, file_extension = os.path.splitext(input_file)
+    base_path, file_extension = os.path.splitext(input_file)
+    # 入力ファイルの横ではなく、このジョブ専用のディレクトリに書き出す
+    base_path = os.path.join(artifact_store.new_job("tab7"), os.path.basename(base_path))
 
     if file_extension.lower() == '.vtt':
         output = process_vtt(lines)
-        output_file = os.path.splitext(input_file)[0] + '_edited.vtt'
+        output_file = base_path + '_edited.vtt'
     elif file_extension.lower() == '.srt':
         output = process_srt(lines)
-        output_file = os.path.splitext(input_file)[0] + '_edited.srt'
+        output_file = base_path + '_edited.srt'
     else:
         raise ValueError('Unsupported file format')
 
@@ -195,7 +113,7 @@ def process_file(input_file):
     # Add the output to a .docx file
     doc = Document()
     doc.add_paragraph(output)
-    basename = os.path.splitext(input_file)[0]
+    basename = base_path
     if file_extension.lower() == '.vtt':
         docx_file = basename + '_edited_vtt.docx'
     elif file_extension.lower() == '.srt':
@@ -277,7 +195,12 @@ def vtt_translate(input_file, translated_content,output_file):
     if input_file==None or translated_content==None or output_file==None:
         return None
     
-    ja_file_name, file_extension = os.path.splitext(input_file)
+    _, file_extension = os.path.splitext(input_file)
+    # 前のジョブ(process_file)の英語字幕を後で読むので、新しいジョブを作る前に使用中にしておく
+    artifact_store.touch(output_file)
+    # 翻訳結果とExcelはこのジョブ専用のディレクトリに書き出す
+    job_dir = artifact_store.new_job("tab7")
+    ja_file_name = os.path.join(job_dir, os.path.splitext(os.path.basename(input_file))[0])
     output_ja_file_path = ja_file_name + "_edited_ja" + file_extension
     if file_extension==".srt":
         corrected_content=correct_srt_format_from_text(translated_content)
@@ -290,146 +213,38 @@ def vtt_translate(input_file, translated_content,output_file):
 
 
     # excel出力
-    output_excel_file = create_excel(output_file, output_ja_file_path)
+    output_excel_file = create_excel(output_file, output_ja_file_path, job_dir)
+    if output_excel_file is None:
+        return [output_ja_file_path]
     return [output_ja_file_path,output_excel_file]
 
-##追加ぶん
-def webvtt_remover(sentence): #tab3用。
-    # 特殊文字を削除
-    sentence = re.sub(r'[\u200B-\u200D\uFEFF]', '', sentence)
-    
-    # 改行文字を統一
-    sentence = sentence.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # VTTフォーマットを修正する正規表現パターン
-    pattern = re.compile(r'(\d+)\n(\d{1}:\d{2}:\d{2}\.\d{3} --> \d{1}:\d{2}:\d{2}\.\d{3})', re.DOTALL)
-
-    # 最初の一致部分を検索
-    match = pattern.search(sentence)
-
-    # 一致部分の開始インデックスを取得
-    if match:
-        start_index = match.start(1)  # 第1キャプチャグループの開始位置を取得
-        rm_webvtt_sentence = sentence[start_index:]
-    elif re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3})', re.DOTALL).search(sentence):
-        pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3})', re.DOTALL)
-        match = pattern.search(sentence)
-        start_index = match.start(1)  # 第1キャプチャグループの開始位置を取得
-        rm_webvtt_sentence = sentence[start_index:]
-    else:
-        rm_webvtt_sentence = sentence
-    
-    return rm_webvtt_sentence
-
-def webvtt_rm(dic):
-
-    sentence="".join(dic)
-    # 改行文字を統一
-    sentence = sentence.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # VTTフォーマットを修正する正規表現パターン
-    pattern = re.compile(r'(\d+)\n(\d{1}:\d{2}:\d{2}\.\d{3} --> \d{1}:\d{2}:\d{2}\.\d{3})', re.DOTALL)
-
-    # 最初の一致部分を検索
-    match = pattern.search(sentence)
-
-    # 一致部分の開始インデックスを取得
-    if match:
-        start_index = match.start(1)  # 第1キャプチャグループの開始位置を取得
-        rm_webvtt_sentence = sentence[start_index:]
-    elif re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3})', re.DOTALL).search(sentence):
-        pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3})', re.DOTALL)
-        match = pattern.search(sentence)
-        start_index = match.start(1)  # 第1キャプチャグループの開始位置を取得
-        rm_webvtt_sentence = sentence[start_index:]
-    else:
-        rm_webvtt_sentence = sentence
-    removed_dic=rm_webvtt_sentence.splitlines()
-
-    return removed_dic
-
-def create_excel(output_file, output_ja_file_path):
-    segments = []
-    if output_file.lower().endswith('.vtt') or output_file.lower().endswith('.srt'):
+# 英語と日本語の字幕を1行ずつ並べたExcelを作る。IDは1から順に振り、1回だけ書き出す。
+def create_excel(output_file, output_ja_file_path, output_dir=None):
+    if not output_file.lower().endswith(('.vtt', '.srt')) or not output_ja_file_path.lower().endswith(('.vtt', '.srt')):
+        print(f"Unsupported file format: {output_file}, {output_ja_file_path}")
+        return None
+    try:
         with open(output_file, 'r') as f:
-            lines = f.readlines()
-            if output_file.lower().endswith('.vtt'):
-                lines = webvtt_rm(lines)
-            segments.extend(parse_segments(lines))
-    
-    if output_ja_file_path.lower().endswith('.vtt') or output_ja_file_path.lower().endswith('.srt'):
-        with codecs.open(output_ja_file_path, 'r', 'utf-8') as f:
-            ja_lines = f.readlines()
-            if output_ja_file_path.lower().endswith('.vtt'):
-                ja_lines = webvtt_rm(ja_lines)
-            ja_segments = parse_segments(ja_lines)
-    
-    excel_data = []
-    for (eng_segment, start, end), ja_segment in zip(segments, ja_segments):
-        if start is not None and end is not None:
-            excel_data.append({
-                'ID': segments.index((eng_segment, start, end)) + 1,
-                'Start': convert_seconds_to_time(start),
-                'End': convert_seconds_to_time(end),
-                'English Subtitle': eng_segment,
-                'Japanese Subtitle': ja_segment[0]
-            })
-        else:
-            print(f"Skipping segment due to missing time: {eng_segment}")
+            english = subtitles.parse(f)
+    except FileNotFoundError:
+        print(f"Error: English subtitle file not found: {output_file}")
+        return None
+    with codecs.open(output_ja_file_path, 'r', 'utf-8') as f:
+        japanese = subtitles.parse(f)
+
+    # 先に字幕数がそろっているか確認する（ずれたまま並べると全ての行の対応が崩れる）
+    if len(english) != len(japanese):
+        print(f"Error: Number of cues in English ({len(english)}) and Japanese ({len(japanese)}) files do not match.")
+        return None
+    english_starts, _ = english.numpy_columns()
+    japanese_starts, _ = japanese.numpy_columns()
+    mismatched = int((english_starts != japanese_starts).sum())
+    if mismatched:
+        print(f"Warning: {mismatched} cues have different start times in the English and Japanese files.")
 
-    df = pd.DataFrame(excel_data)
     output_excel_file = os.path.splitext(output_file)[0] + '.xlsx'
-    df.to_excel(output_excel_file, index=False)
-
-    with pd.ExcelWriter(output_excel_file, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Subtitles')
-        workbook = writer.book
-        worksheet = writer.sheets['Subtitles']
-
-        column_widths = {'A': 7, 'B': 25, 'C': 25, 'D': 90, 'E': 90}
-        for column, width in column_widths.items():
-            worksheet.column_dimensions[column].width = width
-
-        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-            for cell in row:
-                if cell.column_letter == 'A':
-                    cell.alignment = Alignment(horizontal='right', vertical='center')
-                elif cell.column_letter in ['B', 'C']:
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                elif cell.column_letter in ['D', 'E']:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-
-        for row in worksheet.iter_rows(min_row=2, max_row=len(df) + 1):
-            worksheet.row_dimensions[row[0].row].height = 30
-
-        header_font = Font(bold=True)
-        for cell in worksheet["1:1"]:
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-            cell.fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+    if output_dir:
+        output_excel_file = os.path.join(output_dir, os.path.basename(output_excel_file))
+    excel_export.write_cues(output_excel_file, english, japanese, 'vtt', renumber=True)
 
     return output_excel_file
-
-def parse_segments(lines):
-    segments = []
-    start_time = None
-    end_time = None
-    text = ""
-    for line in lines:
-        if re.match(r'^\d+$', line.strip()):
-            if text:
-                segments.append((text.strip(), start_time, end_time))
-            text = ""
-        elif '-->' in line:
-            times = line.strip().split(' --> ')
-            try:
-                start_time = convert_time_to_seconds(times[0])
-                end_time = convert_time_to_seconds(times[1])
-            except ValueError as e:
-                print(f"Error parsing time: {times}, {e}")
-                start_time, end_time = None, None
-        else:
-            text += line.strip() + " "
-    if text:
-        segments.append((text.strip(), start_time, end_time))
-    return segments
@@ -1,6 +1,10 @@
 import gradio as gr
 from gradio_components import gr_components as gc
+from common import scheduler
 
-with gr.Blocks() as UI:
-    gc.gr_components()
-UI.launch(debug=True,inbrowser=True)
\ No newline at end of file
+# 並列文字起こしのワーカーはspawnで起動され、このファイルを読み直すので、UIの起動はmainの時だけにする
+if __name__ == "__main__":
+    with gr.Blocks() as UI:
+        gc.gr_components()
+    scheduler.configure_queue(UI)
+    UI.launch(debug=True,inbrowser=True)
\ No newline at end of file
@@ -0,0 +1,115 @@
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import argparse
+import threading
+from tab1 import tab1_func as t1
+from tab1 import model_registry
+
+# 画面を使わずにTab1の文字起こしをまとめて実行する。
+# 例: python transcribe_cli.py lectures/ "extra/*.mp4" -o out --workers 2 --summary out/summary.json
+# 出力は 出力先/ファイル名/ に書き出す（同じ名前のファイルには _2, _3 を付ける）。
+
+MEDIA_EXTENSIONS = {".mp3", ".mp4", ".m4a", ".wav", ".flac", ".ogg", ".webm", ".mkv", ".mov", ".aac"}
+
+
+def collect_inputs(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in sorted(os.listdir(pattern)):
+                path = os.path.join(pattern, name)
+                if os.path.isfile(path) and os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                    files.append(path)
+        else:
+            files.extend(sorted(glob.glob(pattern)))
+    # 重複を除いて順番は保つ
+    return list(dict.fromkeys(files))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tab1の文字起こしを画面なしで一括実行します。")
+    parser.add_argument("inputs", nargs="+", help="メディアファイルのあるディレクトリ、またはglobパターン")
+    parser.add_argument("-o", "--output-dir", required=True, help="出力先ディレクトリ")
+    parser.add_argument("--model", default="large-v2")
+    parser.add_argument("--compute-type", default="float32", choices=["int8", "float16", "float32"])
+    parser.add_argument("--device", default="auto", choices=["auto", "cpu", "cuda"])
+    parser.add_argument("--cpu-threads", type=int, default=0, help="0はコア数を--workersで割った数")
+    parser.add_argument("--lang", default="en", choices=["en", "ja"])
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--no-vad", action="store_true", help="Vad-Filterを使わない")
+    parser.add_argument("--workers", type=int, default=1, help="同時に処理するファイル数")
+    parser.add_argument("--formats", nargs="*", default=t1.DEFAULT_OUTPUTS, choices=t1.OUTPUT_FORMATS,
+                        help="SRT以外に作るファイル")
+    parser.add_argument("--summary", help="処理結果のJSONを書き出すパス（省略時は出力先のsummary.json）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No input files found.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    workers = max(1, args.workers)
+    # 1つのモデルを全ワーカーで共有する。num_workersを合わせて同時に推論できるようにする。
+    device, compute_type, model_kwargs = model_registry.resolve_device(args.device, args.compute_type, args.cpu_threads, workers)
+    model = model_registry.get_model(args.model, device=device, compute_type=compute_type, **model_kwargs)
+
+    work_queue = queue.Queue()
+    for index, (path, output_dir) in enumerate(zip(files, t1.batch_output_dirs(files, args.output_dir))):
+        work_queue.put((index, path, output_dir))
+    manifest = [None] * len(files)
+    lock = threading.Lock()
+    totals = {"audio": 0.0}
+
+    def worker():
+        while True:
+            try:
+                index, path, output_dir = work_queue.get_nowait()
+            except queue.Empty:
+                return
+            file_start = time.perf_counter()
+            entry = {"file": path}
+            try:
+                result, duration = t1.transcribe_to_files(
+                    path, model, args.model, compute_type, args.lang, args.beam_size, not args.no_vad,
+                    args.formats, output_dir)
+                entry.update({
+                    "status": "ok",
+                    "duration": round(duration, 3),
+                    "outputs": result[3] + result[4],
+                })
+                with lock:
+                    totals["audio"] += duration
+            except Exception as e:
+                entry.update({"status": "error", "error": str(e)})
+            entry["seconds"] = round(time.perf_counter() - file_start, 3)
+            manifest[index] = entry
+            print(f"[{entry['status']}] {path} ({entry['seconds']}s)")
+
+    batch_start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(min(workers, len(files)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = t1.batch_summary(manifest, time.perf_counter() - batch_start, totals["audio"], args.model, device, compute_type)
+    summary["workers"] = workers
+    summary_path = args.summary or os.path.join(args.output_dir, "summary.json")
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=4)
+
+    print(f"{summary['succeeded']}/{summary['files']} files, {summary['files_per_minute']} files/min, "
+          f"RTF {summary['real_time_factor']}, summary: {summary_path}")
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())